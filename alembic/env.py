@@ -8,7 +8,7 @@ from alembic import context
 # Make project root importable
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from api.db_models import Base, RecipeDB, UserDB, CookbookDB  # IMPORTANT: imports all models
+from api.db_models import Base, RecipeDB, UserDB, CookbookDB, RecipeLSHBucketDB, RateLimitBucketDB, UserStatsDB  # IMPORTANT: imports all models
 
 config = context.config
 
@@ -18,6 +18,11 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+def include_name(name, type_, parent_names):
+    # Checkpoints von api/backfill.py sind kein Teil des Schemas
+    return not (type_ == "table" and name == "backfill_checkpoints")
+
+
 def get_url():
     url = os.getenv("PROD_POSTGRES_URL")
     if url:
@@ -33,6 +38,7 @@ def run_migrations_offline():
         target_metadata=target_metadata,
         literal_binds=True,
         compare_type=True,
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -53,6 +59,7 @@ def run_migrations_online():
             target_metadata=target_metadata,
             compare_type=True,
             compare_server_default=True,
+            include_name=include_name,
         )
 
         with context.begin_transaction():
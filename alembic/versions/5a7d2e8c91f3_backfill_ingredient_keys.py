@@ -0,0 +1,34 @@
+"""backfill ingredient keys
+
+Revision ID: 5a7d2e8c91f3
+Revises: c3e1a9f04b27
+Create Date: 2026-10-19 21:16:05.441907
+
+"""
+from typing import Sequence, Union
+
+from api.backfill import online_backfill
+from api.meal_planner import ingredient_keys
+
+
+revision: str = '5a7d2e8c91f3'
+down_revision: Union[str, Sequence[str], None] = 'c3e1a9f04b27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def fill(row):
+    keys = "|".join(ingredient_keys(row.ingredients_str))
+    return {"ingredient_keys": keys} if keys != row.ingredient_keys else None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Eigene Revision ohne DDL, damit ein abgebrochener Lauf am Checkpoint fortsetzen kann
+    online_backfill("recipes_ingredient_keys", "recipes", ["ingredients_str", "ingredient_keys"], fill)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Spalte wird in der vorherigen Revision entfernt
+    pass
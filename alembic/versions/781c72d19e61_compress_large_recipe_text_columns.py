@@ -0,0 +1,55 @@
+"""compress large recipe text columns
+
+Revision ID: 781c72d19e61
+Revises: 9bcbee7ac38f
+Create Date: 2026-10-19 15:21:09.664310
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from api.backfill import online_backfill
+from api.compressed_text import compress_text, decompress_text
+
+
+revision: str = '781c72d19e61'
+down_revision: Union[str, Sequence[str], None] = '9bcbee7ac38f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ["description", "instructions", "notes"]
+
+
+def converter(convert):
+    def transform(row):
+        values = {column: convert(getattr(row, column)) for column in COLUMNS}
+        changed = {column: value for column, value in values.items() if value != getattr(row, column)}
+        return changed or None
+    return transform
+
+
+def recompress(value):
+    # Rohwerte aus der DB: erst in Klartext zurückführen, damit ein erneuter Lauf nichts doppelt komprimiert
+    return compress_text(decompress_text(value))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Typänderung ist idempotent, ein erneuter Lauf nach Abbruch setzt daher am Checkpoint fort
+    with op.batch_alter_table('recipes') as batch_op:
+        batch_op.alter_column('description', existing_type=sa.String(), type_=sa.Text())
+
+    # Bestandsdaten nur umwandeln, wenn die Kompression auch aktiviert ist
+    if os.getenv("COMPRESS_RECIPE_TEXT") == "1":
+        online_backfill("compress_recipe_text", "recipes", COLUMNS, converter(recompress))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    online_backfill("decompress_recipe_text", "recipes", COLUMNS, converter(decompress_text))
+
+    with op.batch_alter_table('recipes') as batch_op:
+        batch_op.alter_column('description', existing_type=sa.Text(), type_=sa.String())
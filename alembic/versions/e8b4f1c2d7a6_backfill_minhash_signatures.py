@@ -0,0 +1,57 @@
+"""backfill minhash signatures
+
+Revision ID: e8b4f1c2d7a6
+Revises: 5a7d2e8c91f3
+Create Date: 2026-10-19 21:48:30.927154
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from api.backfill import online_backfill
+from api.recipe_dedup import band_buckets, decode_signature, encode_signature, recipe_signature
+
+
+revision: str = 'e8b4f1c2d7a6'
+down_revision: Union[str, Sequence[str], None] = '5a7d2e8c91f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+buckets = sa.table(
+    'recipe_lsh_buckets',
+    sa.column('recipe_id'), sa.column('band'), sa.column('owner_id'), sa.column('bucket'),
+)
+
+
+def fill(row):
+    signature = recipe_signature(row.title, row.ingredients_str)
+    encoded = encode_signature(signature) if signature else None
+    return {"minhash_signature": encoded} if encoded != row.minhash_signature else None
+
+
+def write_buckets(conn, changed):
+    # Buckets der geänderten Rezepte komplett neu schreiben (auch alte Einträge ohne Tokens entfernen)
+    conn.execute(buckets.delete().where(buckets.c.recipe_id.in_([row.id for row, _ in changed])))
+    rows = [
+        {"recipe_id": row.id, "band": band, "owner_id": row.owner_id, "bucket": bucket}
+        for row, values in changed if values["minhash_signature"]
+        for band, bucket in enumerate(band_buckets(decode_signature(values["minhash_signature"])))
+    ]
+    if rows:
+        conn.execute(buckets.insert(), rows)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    online_backfill(
+        "recipes_minhash_signature", "recipes",
+        ["title", "ingredients_str", "owner_id", "minhash_signature"], fill,
+        on_batch=write_buckets,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Signaturen bleiben, die Spalten verschwinden mit 98d80ed51846
+    pass
@@ -1 +1 @@
-from .db_models import RecipeDB, UserDB, CookbookDB # central import for alembic
\ No newline at end of file
+from .db_models import RecipeDB, UserDB, CookbookDB, RecipeLSHBucketDB, RateLimitBucketDB, UserStatsDB # central import for alembic
\ No newline at end of file
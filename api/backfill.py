@@ -0,0 +1,167 @@
+"""
+Chunked, resumable data backfills for Alembic migrations.
+
+Usage: schema change and backfill go into two separate revisions, e.g.
+
+    # revision a1: add column
+    def upgrade() -> None:
+        op.add_column('recipes', sa.Column('servings_text', sa.String(), nullable=True))
+
+    # revision a2 (down_revision = a1): fill it
+    from api.backfill import online_backfill
+
+    def upgrade() -> None:
+        def fill(row):
+            return {"servings_text": f"{row.yields} Portionen"} if row.yields else None
+
+        online_backfill("recipes_servings_text", "recipes", ["yields", "servings_text"], fill)
+
+Rows are read in primary-key order (keyset pagination, no OFFSET) and each
+batch is written in its own transaction together with a checkpoint, so locks
+are held for one batch only and an interrupted run continues after the last
+committed batch. Works on SQLite and Postgres.
+
+The separate revision matters for resuming: online_backfill() commits
+everything before it, including the stamp of the DDL revision, but the
+backfill revision itself is only stamped once it has finished. Rerunning
+"alembic upgrade head" after an interruption therefore skips the DDL and goes
+straight back to the checkpoint. DDL in the same upgrade() as the backfill
+would run a second time and fail (e.g. "duplicate column name").
+"""
+import datetime
+import logging
+import time
+from typing import Callable, List, Optional, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection, Row
+
+
+logger = logging.getLogger("alembic.backfill")
+
+checkpoints = sa.Table(
+    "backfill_checkpoints",
+    sa.MetaData(),
+    sa.Column("name", sa.String(), primary_key=True),
+    sa.Column("last_key", sa.Integer(), nullable=False),
+    sa.Column("rows_done", sa.Integer(), nullable=False),
+    sa.Column("updated_at", sa.DateTime(), nullable=False),
+)
+
+
+def run_backfill(
+    engine,
+    name: str,
+    table_name: str,
+    columns: List[str],
+    transform: Callable[[Row], Optional[dict]],
+    batch_size: int = 500,
+    throttle: float = 0.0,
+    key_column: str = "id",
+    log: Callable[[str], None] = logger.info,
+    on_batch: Optional[Callable[[Connection, List[Tuple[Row, dict]]], None]] = None,
+) -> dict:
+    """
+    Apply `transform` to every row of `table_name`. `transform` gets a row with
+    the key and `columns` and returns the changed values (keys from `columns`)
+    or None to leave the row alone. `throttle` seconds are slept between batches.
+
+    `key_column` must be a unique integer column (the checkpoint stores it as
+    an integer), usually the primary key.
+
+    `on_batch` gets the connection and the (row, changed values) pairs of each
+    batch, inside the batch's transaction, for writes to dependent tables.
+    """
+    table = sa.table(table_name, sa.column(key_column), *[sa.column(c) for c in columns])
+    key = table.c[key_column]
+    checkpoints.create(engine, checkfirst=True)
+
+    with engine.connect() as conn:
+        state = conn.execute(sa.select(checkpoints).where(checkpoints.c.name == name)).first()
+    checkpoint_exists = state is not None
+    last_key = state.last_key if state else None
+    rows_done = state.rows_done if state else 0
+    if state:
+        log(f"{name}: resuming after {key_column}={last_key} ({rows_done} rows done)")
+
+    started = time.monotonic()
+    rows_this_run = 0
+    while True:
+        query = sa.select(table).order_by(key).limit(batch_size)
+        if last_key is not None:
+            query = query.where(key > last_key)
+
+        with engine.begin() as conn:
+            rows = conn.execute(query).fetchall()
+            if not rows:
+                break
+
+            # Updates nach geänderten Spalten gruppieren, dann executemany pro Gruppe
+            updates = {}
+            changed = []
+            for row in rows:
+                values = transform(row)
+                if values:
+                    changed.append((row, values))
+                    updates.setdefault(tuple(sorted(values)), []).append(
+                        dict({"_key": row[0]}, **{"new_" + c: v for c, v in values.items()})
+                    )
+            for changed_columns, params in updates.items():
+                conn.execute(
+                    table.update().where(key == sa.bindparam("_key")).values(
+                        {c: sa.bindparam("new_" + c) for c in changed_columns}
+                    ),
+                    params,
+                )
+            if on_batch and changed:
+                on_batch(conn, changed)
+
+            last_key = rows[-1][0]
+            if not isinstance(last_key, int):
+                raise TypeError(f"{name}: key column {key_column!r} must be an integer column")
+            rows_done += len(rows)
+            rows_this_run += len(rows)
+            _save_checkpoint(conn, name, last_key, rows_done, checkpoint_exists)
+            checkpoint_exists = True
+
+        elapsed = time.monotonic() - started
+        log(f"{name}: {rows_done} rows, {rows_this_run / elapsed if elapsed else 0:.0f} rows/s, "
+            f"last {key_column}={last_key}")
+        if throttle:
+            time.sleep(throttle)
+
+    # Fertig: Checkpoint entfernen, damit ein erneuter Lauf (z.B. nach downgrade) wieder von vorn beginnt
+    with engine.begin() as conn:
+        conn.execute(checkpoints.delete().where(checkpoints.c.name == name))
+
+    elapsed = time.monotonic() - started
+    stats = {
+        "rows": rows_done,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(rows_this_run / elapsed) if elapsed else 0,
+    }
+    log(f"{name}: done, {stats['rows']} rows in {stats['seconds']} s ({stats['rows_per_second']} rows/s)")
+    return stats
+
+
+def _save_checkpoint(conn, name, last_key, rows_done, exists):
+    values = {"last_key": last_key, "rows_done": rows_done, "updated_at": datetime.datetime.utcnow()}
+    if exists:
+        conn.execute(checkpoints.update().where(checkpoints.c.name == name).values(**values))
+    else:
+        conn.execute(checkpoints.insert().values(name=name, **values))
+
+
+def online_backfill(name: str, table_name: str, columns: List[str], transform, **kwargs) -> Optional[dict]:
+    """run_backfill() from inside a migration, outside the migration's own transaction."""
+    from alembic import op
+
+    context = op.get_context()
+    if context.as_sql:
+        # Offline (--sql): Daten lassen sich nicht als statisches SQL backfillen
+        context.impl.static_output(f"-- skipped data backfill '{name}', run the migration online")
+        return None
+
+    # Alles davor committen (auch vorherige Revisionen); jeder Batch läuft danach in einer eigenen Transaktion
+    with context.autocommit_block():
+        return run_backfill(op.get_bind().engine, name, table_name, columns, transform, **kwargs)
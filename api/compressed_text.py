@@ -0,0 +1,61 @@
+import base64
+import os
+import zlib
+from typing import Optional
+
+from sqlalchemy import Text
+from sqlalchemy.types import TypeDecorator
+
+
+COMPRESSED_PREFIX = "~z1~"
+# Klartext, der selbst mit "~z" beginnt, wird mit ESCAPE_PREFIX gespeichert,
+# damit er nie für komprimierte Daten gehalten wird
+ESCAPE_PREFIX = "~z0~"
+MARKER_START = "~z"
+# Kleine Texte lohnen sich nicht (Base64 + Header fressen den Gewinn auf)
+COMPRESS_MIN_LENGTH = 512
+
+
+def escape_text(value: Optional[str]) -> Optional[str]:
+    """Stored form of an uncompressed value."""
+    if value is not None and value.startswith(MARKER_START):
+        return ESCAPE_PREFIX + value
+    return value
+
+
+def compress_text(value: Optional[str]) -> Optional[str]:
+    """Stored form of a value: compressed if that pays off, otherwise escaped plain text."""
+    if value is None or len(value) < COMPRESS_MIN_LENGTH:
+        return escape_text(value)
+    packed = COMPRESSED_PREFIX + base64.b64encode(zlib.compress(value.encode("utf-8"), 6)).decode("ascii")
+    return packed if len(packed) < len(value) else escape_text(value)
+
+
+def decompress_text(value: Optional[str]) -> Optional[str]:
+    """Inverse of compress_text() and escape_text()."""
+    if value is None:
+        return value
+    if value.startswith(COMPRESSED_PREFIX):
+        return zlib.decompress(base64.b64decode(value[len(COMPRESSED_PREFIX):])).decode("utf-8")
+    if value.startswith(ESCAPE_PREFIX):
+        return value[len(ESCAPE_PREFIX):]
+    return value
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text column that stores large values zlib-compressed (base64, with a marker
+    prefix) when COMPRESS_RECIPE_TEXT=1. Reading is transparent for both plain
+    and compressed rows, so the flag can be switched on or off at any time.
+    """
+
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if os.getenv("COMPRESS_RECIPE_TEXT") == "1":
+            return compress_text(value)
+        return escape_text(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
@@ -1,10 +1,11 @@
 import uuid
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from sqlalchemy import Table
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Text, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import BigInteger, Boolean, Column, Float, ForeignKey, Index, Integer, JSON, String, Text, DateTime
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.ext.declarative import declarative_base
 from typing import List, Optional
+from .compressed_text import CompressedText
 
 
 Base = declarative_base()
@@ -23,13 +24,13 @@ class RecipeDB(Base):
     id = Column(Integer, primary_key=True, index=True)
     public_id = Column(String, unique=True, index=True, default=lambda: str(uuid.uuid4()))
     title = Column(String, index=True)
-    description = Column(String)
+    description = Column(CompressedText)
     image_url = Column(String)
     original_url = Column(String)
     # Storing ingredients as a pipe-separated string for simplicity in PoC
     # e.g. "Shrimp|Garlic|Pasta"
     ingredients_str = Column(Text) 
-    instructions = Column(Text)
+    instructions = Column(CompressedText)
 
     owner_id = Column(Integer, ForeignKey("users.id"))
     owner = relationship("UserDB", back_populates="recipes")
@@ -38,14 +39,49 @@ class RecipeDB(Base):
     cook_time = Column(Integer, nullable=True)    # Kochzeit in Minuten
     total_time = Column(Integer, nullable=True)   # Gesamtzeit in Minuten
     yields = Column(Integer, nullable=True)       # Anzahl der Portionen (z.B. 4)
-    notes = Column(Text, nullable=True)             # Persönliche Notizen
+    notes = Column(CompressedText, nullable=True)   # Persönliche Notizen
     rating = Column(Integer, default=0)             # 0 bis 5 Sterne
     cook_count = Column(Integer, default=0)         # Wie oft gekocht
     last_cooked = Column(DateTime, nullable=True)   # Wann zuletzt gekocht
 
+    # Refresh der Quelle (siehe recipe_refresher.py)
+    last_fetched = Column(DateTime, nullable=True, index=True)  # Letzter Abruf von original_url
+    etag = Column(String, nullable=True)                        # für If-None-Match
+    http_last_modified = Column(String, nullable=True)          # für If-Modified-Since
+
     # cookbooks relationship
     cookbooks = relationship("CookbookDB", secondary=cookbook_recipe_association, back_populates="recipes")
 
+    # MinHash-Signatur über Titel + Zutaten (hex), für die Duplikaterkennung.
+    # deferred: soll nicht in jeder Rezeptliste mit ausgeliefert werden
+    minhash_signature = deferred(Column(Text, nullable=True))
+    lsh_buckets = relationship("RecipeLSHBucketDB", cascade="all, delete-orphan")
+
+    # Normalisierte Zutaten-Keys, pipe-separiert (z.B. "knoblauch|olivenöl|spaghetti"),
+    # beim Import/Refresh berechnet, damit der Wochenplaner nicht pro Request normalisieren muss
+    ingredient_keys = deferred(Column(Text, nullable=True))
+
+
+class RecipeLSHBucketDB(Base):
+    __tablename__ = "recipe_lsh_buckets"
+
+    # Ein Eintrag pro LSH-Band und Rezept; gleiche bucket-Werte = Duplikat-Kandidaten
+    recipe_id = Column(Integer, ForeignKey("recipes.id"), primary_key=True)
+    band = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id"))
+    bucket = Column(BigInteger)
+
+    __table_args__ = (Index("ix_recipe_lsh_buckets_owner_bucket", "owner_id", "bucket"),)
+
+
+class RateLimitBucketDB(Base):
+    __tablename__ = "rate_limit_buckets"
+
+    # Token-Bucket, geteilt zwischen Workern (nur mit RATE_LIMIT_BACKEND=db)
+    key = Column(String, primary_key=True)      # z.B. "import-user:42" oder "import-host:example.com"
+    tokens = Column(Float)
+    updated_at = Column(Float)                  # Unix-Zeit des letzten Zugriffs
+
 
 class RecipeImport(BaseModel):
     url: str
@@ -56,6 +92,13 @@ class RecipeUpdate(BaseModel):
     rating: Optional[int] = None
     notes: Optional[str] = None
 
+class MealPlanRequest(BaseModel):
+    days: int = Field(7, ge=1, le=28)          # höchstens 4 Wochen, Solver ist O(days * n)
+    max_time_per_day: Optional[int] = None     # in Minuten, None = egal
+    cookbook_ids: Optional[List[int]] = []     # leer = ganze Bibliothek
+    no_repeat_weeks: int = 0                   # nicht gekocht in den letzten K Wochen
+    overlap_weight: float = 1.0                # Gewicht für gemeinsame Zutaten vs. Rating
+
 class UserDB(Base):
     __tablename__ = "users"
 
@@ -64,6 +107,7 @@ class UserDB(Base):
     hashed_password = Column(String)
     is_active = Column(Boolean, default=True)
     is_approved = Column(Boolean, default=False) # Admin muss genehmigen
+    last_write_at = Column(DateTime, nullable=True)  # Letzte Änderung (Read-your-writes beim Replica-Routing)
 
     recipes = relationship("RecipeDB", back_populates="owner")
 
@@ -78,4 +122,19 @@ class CookbookDB(Base):
     name = Column(String, index=True)
     owner_id = Column(Integer, ForeignKey("users.id"))
     
-    recipes = relationship("RecipeDB", secondary=cookbook_recipe_association, back_populates="cookbooks")
\ No newline at end of file
+    recipes = relationship("RecipeDB", secondary=cookbook_recipe_association, back_populates="cookbooks")
+
+
+class UserStatsDB(Base):
+    __tablename__ = "user_stats"
+
+    # Inkrementell gepflegte Aggregate pro User (siehe library_stats.py), eine Zeile pro User
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    recipe_count = Column(Integer, default=0)
+    rating_sum = Column(Integer, default=0)
+    rated_count = Column(Integer, default=0)     # Rezepte mit Rating > 0
+    cook_count = Column(Integer, default=0)
+    time_buckets = Column(JSON)                  # {"0-15": 3, "16-30": 7, ...}
+    domains = Column(JSON)                       # {"chefkoch.de": 12, ...}
+    cookbooks = Column(JSON)                     # {"<id>": {"name": ..., "count": ...}}
+    top_cooked = Column(JSON)                    # [{"id", "title", "cook_count"}], absteigend
\ No newline at end of file
@@ -0,0 +1,115 @@
+import datetime
+import threading
+import time
+from itertools import chain
+from typing import Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from .db_models import UserDB
+
+
+class ReadWriteRouter:
+    """
+    Hands out sessions for read-only endpoints: the replica if one is
+    configured and healthy, otherwise the primary.
+
+    Read-your-writes: a user who changed something within the last
+    `sticky_seconds` reads from the primary, so replication lag never hides
+    their own changes. The timestamp lives on the user row (users.last_write_at)
+    and is set automatically when a primary session flushes changes for the
+    logged-in user, so stickiness holds across workers.
+
+    Fallback is per request: a replica that fails the health check is skipped
+    for `retry_after` seconds. A request whose replica connection breaks while
+    it runs is not retried on the primary (the endpoint has already run when
+    the dependency sees the error); it fails, and only later requests are
+    routed to the primary. Give the replica engine a connect timeout so the
+    health check fails fast (see index.py).
+    """
+
+    def __init__(
+        self,
+        primary: sessionmaker,
+        replica_engine=None,
+        sticky_seconds: float = 10.0,
+        health_check_interval: float = 5.0,
+        retry_after: float = 30.0,
+    ):
+        self.primary = primary
+        self.replica = (
+            sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) if replica_engine else None
+        )
+        self.replica_engine = replica_engine
+        self.sticky = datetime.timedelta(seconds=sticky_seconds)
+        self.health_check_interval = health_check_interval
+        self.retry_after = retry_after
+
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._healthy = replica_engine is not None
+
+        event.listen(primary, "before_flush", self._record_write)
+
+    # --- stickiness ---
+
+    @staticmethod
+    def _record_write(session, flush_context, instances):
+        user = session.info.get("current_user")
+        if user is None:
+            return
+        if any(obj is not user for obj in chain(session.new, session.dirty, session.deleted)):
+            user.last_write_at = datetime.datetime.utcnow()
+
+    def _recently_wrote(self, user: Optional[UserDB]) -> bool:
+        if user is None or user.last_write_at is None:
+            return False
+        return datetime.datetime.utcnow() - user.last_write_at < self.sticky
+
+    # --- replica health ---
+
+    def mark_replica_down(self):
+        with self._lock:
+            self._healthy = False
+            self._next_check = time.monotonic() + self.retry_after
+
+    def replica_available(self) -> bool:
+        if self.replica is None:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_check:
+                return self._healthy
+            # Nur ein Thread prüft, die anderen nehmen solange den letzten Stand
+            self._next_check = now + self.health_check_interval
+        try:
+            with self.replica_engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception:
+            self.mark_replica_down()
+            return False
+        with self._lock:
+            self._healthy = True
+        return True
+
+    # --- sessions ---
+
+    def read_session(self, user: Optional[UserDB] = None):
+        if not self._recently_wrote(user) and self.replica_available():
+            return self.replica()
+        return self.primary()
+
+    def read_session_scope(self, user: Optional[UserDB] = None):
+        """Generator for FastAPI dependencies, like get_db."""
+        db = self.read_session(user)
+        try:
+            yield db
+        except OperationalError:
+            # Replica mitten im Request weggebrochen: nächste Requests gehen auf den Primary
+            if db.get_bind() is self.replica_engine:
+                self.mark_replica_down()
+            raise
+        finally:
+            db.close()
@@ -1,5 +1,7 @@
 import os
+import math
 import datetime
+from urllib.parse import urlsplit
 from fastapi import FastAPI, Depends, HTTPException, Request, status
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,7 +11,16 @@ from jose import JWTError, jwt
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session, joinedload
 from .recipe_scraper import scrape_jsonld
-from .db_models import RecipeDB, RecipeImport, RecipeUpdate, Base, UserDB, UserCreate, CookbookDB
+from .db_models import RecipeDB, RecipeImport, RecipeUpdate, MealPlanRequest, Base, UserDB, UserCreate, CookbookDB, UserStatsDB
+from .meal_planner import index_ingredients, load_library, plan_meals
+from .recipe_dedup import find_duplicate_clusters, find_similar, index_recipe, recipe_signature
+from .recipe_refresher import RecipeRefresher
+from .rate_limit import InMemoryBackend, SQLBackend, RateLimiter, SingleFlight, canonical_url
+from .compression import CompressionMiddleware
+from .db_routing import ReadWriteRouter
+from .library_stats import (
+    rebuild_stats, recipe_facts, record_cookbook, record_cookbook_membership, record_recipe_change, stats_response,
+)
 from .login_auth import verify_password, get_password_hash, create_access_token, SECRET_KEY, ALGORITHM
 
 
@@ -32,6 +43,31 @@ else:
 engine = create_engine(DATABASE_URL, connect_args=connect_args)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional read replica for read-only endpoints (locally e.g. sqlite:///./replica_recipes.db)
+REPLICA_URL = os.getenv("POSTGRES_REPLICA_URL")
+replica_engine = None
+
+if REPLICA_URL:
+    if REPLICA_URL.startswith("postgres://"):
+        REPLICA_URL = REPLICA_URL.replace("postgres://", "postgresql://", 1)
+    replica_engine = create_engine(
+        REPLICA_URL,
+        # connect_timeout: eine nicht erreichbare Replica soll nicht den OS-TCP-Timeout lang blockieren
+        connect_args={"check_same_thread": False} if REPLICA_URL.startswith("sqlite") else {"connect_timeout": 2},
+    )
+
+db_router = ReadWriteRouter(
+    SessionLocal,
+    replica_engine,
+    sticky_seconds=float(os.getenv("REPLICA_STICKY_SECONDS", "10")),
+)
+
+# Rate limits for imports: in-process by default, RATE_LIMIT_BACKEND=db shares them between workers
+rate_limit_backend = SQLBackend(engine) if os.getenv("RATE_LIMIT_BACKEND") == "db" else InMemoryBackend()
+import_user_limiter = RateLimiter(rate_limit_backend, "import-user", per_minute=10, capacity=10)
+import_host_limiter = RateLimiter(rate_limit_backend, "import-host", per_minute=30, capacity=5)
+import_flights = SingleFlight()
+
 
 # --- 2. APP SETUP ---
 
@@ -47,6 +83,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# zstd / Brotli / gzip for responses >= 1 KB (recipe lists are mostly text)
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -55,6 +94,10 @@ def get_db():
     finally:
         db.close()
 
+# Dependency for read-only endpoints: replica if available, see db_routing.py
+def get_public_read_db():
+    yield from db_router.read_session_scope()
+
 # OAuth2 Schema
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/token")
 
@@ -76,6 +119,7 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     user = db.query(UserDB).filter(UserDB.email == email).first()
     if user is None:
         raise credentials_exception
+    db.info["current_user"] = user  # für Read-your-writes (siehe db_routing.py)
     
     # Check: Ist der User vom Admin approved?
     if not user.is_approved:
@@ -83,6 +127,9 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
          
     return user
 
+def get_read_db(current_user: UserDB = Depends(get_current_user)):
+    yield from db_router.read_session_scope(current_user)
+
 # --- AUTH ENDPUNKTE ---
 
 @app.post("/api/register")
@@ -134,18 +181,46 @@ def startup():
     db.close()
 
 # --- 4. ENDPOINTS ---
+# Scheduled refresh of stale recipes (Vercel Cron, see vercel.json)
+@app.get("/api/cron/refresh")
+def refresh_stale_recipes(request: Request, db: Session = Depends(get_db)):
+    cron_secret = os.getenv("CRON_SECRET")
+    if not cron_secret or request.headers.get("Authorization") != f"Bearer {cron_secret}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    return RecipeRefresher().run(db)
+
 # Get all recipes
 @app.get("/api/recipes")
-def read_recipes(db: Session = Depends(get_db), current_user: UserDB = Depends(get_current_user)):
+def read_recipes(db: Session = Depends(get_read_db), current_user: UserDB = Depends(get_current_user)):
     # only recipes of the logged in user
     recipes = db.query(RecipeDB).filter(RecipeDB.owner_id == current_user.id).all()
     return recipes
 
+# Library statistics from the per-user aggregate row (see library_stats.py)
+@app.get("/api/stats")
+def get_stats(db: Session = Depends(get_read_db), current_user: UserDB = Depends(get_current_user)):
+    stats = db.query(UserStatsDB).filter(UserStatsDB.user_id == current_user.id).first()
+    if stats is None:
+        # Erstes Mal für diesen User: einmalig auf dem Primary aufbauen
+        primary = SessionLocal()
+        try:
+            stats = rebuild_stats(primary, current_user.id)
+            primary.commit()
+            return stats_response(stats)
+        finally:
+            primary.close()
+    return stats_response(stats)
+
+# Clusters of likely duplicate recipes (must be registered before /api/recipes/{recipe_id})
+@app.get("/api/recipes/duplicates")
+def get_duplicate_recipes(db: Session = Depends(get_db), current_user: UserDB = Depends(get_current_user)):
+    return {"clusters": find_duplicate_clusters(db, current_user.id)}
+
 # Endpoint to get recipe detail including cookbooks
 @app.get("/api/recipes/{recipe_id}")
 def get_recipe_detail(
     recipe_id: int, 
-    db: Session = Depends(get_db), 
+    db: Session = Depends(get_read_db), 
     current_user: UserDB = Depends(get_current_user) # Neu hinzugefügt
 ):
     recipe = db.query(RecipeDB).options(joinedload(RecipeDB.cookbooks)).filter(
@@ -159,7 +234,7 @@ def get_recipe_detail(
 
 
 @app.get("/r/{recipe_uuid}", response_class=HTMLResponse)
-def recipe_import_page(request: Request, recipe_uuid: str, db: Session = Depends(get_db)):
+def recipe_import_page(request: Request, recipe_uuid: str, db: Session = Depends(get_public_read_db)):
     
     # get uuid of recipe
     recipe = db.query(RecipeDB).filter(RecipeDB.public_id == recipe_uuid).first()
@@ -187,9 +262,20 @@ def recipe_import_page(request: Request, recipe_uuid: str, db: Session = Depends
     
     return response
 
+def check_rate_limit(limiter: RateLimiter, key):
+    retry_after = limiter.hit(key)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many imports, please try again later.",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
 # for recipe import
 @app.post("/api/import")
 def import_recipe(item: RecipeImport, db: Session = Depends(get_db), current_user: UserDB = Depends(get_current_user)):
+    check_rate_limit(import_user_limiter, current_user.id)
+
     # check if recipe with this url already exists for this user
     existing_recipe = db.query(RecipeDB).filter(
             RecipeDB.original_url == item.url,
@@ -203,20 +289,30 @@ def import_recipe(item: RecipeImport, db: Session = Depends(get_db), current_use
             detail="Recipe already imported."
         )
     
-    scraped_data = scrape_jsonld(item.url)
+    # Gleichzeitige Imports derselben URL teilen sich einen Abruf
+    def fetch():
+        check_rate_limit(import_host_limiter, urlsplit(item.url).netloc.lower())
+        return scrape_jsonld(item.url)
+
+    scraped_data = import_flights.do(canonical_url(item.url), fetch)
+
+    # Near-duplicates (AMP-/Mobil-Links, andere Seite) nur melden, nicht blockieren
+    signature = recipe_signature(scraped_data["title"], scraped_data["ingredients_str"])
+    possible_duplicates = find_similar(db, current_user.id, signature) if signature else []
 
     # In DB speichern
     new_recipe = RecipeDB(
         title=scraped_data["title"],
         description=scraped_data["description"],
         image_url=scraped_data["image_url"],
-        original_url=scraped_data["original_url"],
+        original_url=item.url,  # nicht scraped_data: Abruf evtl. mit anderer Schreibweise geteilt
         ingredients_str=scraped_data["ingredients_str"],
         instructions=scraped_data["instructions"],
         prep_time=scraped_data.get("prep_time"),
         cook_time=scraped_data.get("cook_time"),
         total_time=scraped_data.get("total_time"),
         yields=scraped_data.get("yields"),
+        last_fetched=datetime.datetime.utcnow(),
         owner_id=current_user.id
     )
     # 3. Falls Cookbook IDs übergeben wurden, die Beziehung setzen
@@ -227,11 +323,17 @@ def import_recipe(item: RecipeImport, db: Session = Depends(get_db), current_use
         ).all()
         new_recipe.cookbooks = cookbooks
 
+    index_recipe(new_recipe, signature)
+    index_ingredients(new_recipe)
+
     db.add(new_recipe)
+    record_recipe_change(db, current_user.id, None, recipe_facts(new_recipe))
+    for cb in new_recipe.cookbooks:
+        record_cookbook_membership(db, current_user.id, cb.id, +1)
     db.commit()
     db.refresh(new_recipe)
     
-    return {"id": new_recipe.id, "title": new_recipe.title}
+    return {"id": new_recipe.id, "title": new_recipe.title, "possible_duplicates": possible_duplicates}
 
 
 # mark recipe as cooked
@@ -241,11 +343,13 @@ def mark_as_cooked(id: int, db: Session = Depends(get_db), current_user: UserDB
     if not recipe:
         raise HTTPException(status_code=404, detail="Rezept nicht gefunden")
     
+    before = recipe_facts(recipe)
     if recipe.cook_count is None:
         recipe.cook_count = 0
         
     recipe.cook_count += 1
     recipe.last_cooked = datetime.datetime.utcnow()
+    record_recipe_change(db, current_user.id, before, recipe_facts(recipe))
     db.commit()
     return {"cook_count": recipe.cook_count, "last_cooked": recipe.last_cooked}
 
@@ -267,6 +371,8 @@ def update_recipe(
     if not recipe:
         raise HTTPException(status_code=404, detail="Rezept nicht gefunden")
 
+    before = recipe_facts(recipe)
+
     # Nur die Felder aktualisieren, die im Request gesendet wurden
     if update_data.rating is not None:
         # Validierung: Sicherstellen, dass das Rating zwischen 0 und 5 liegt
@@ -275,11 +381,24 @@ def update_recipe(
     if update_data.notes is not None:
         recipe.notes = update_data.notes
 
+    record_recipe_change(db, current_user.id, before, recipe_facts(recipe))
     db.commit()
     db.refresh(recipe)
     
     return recipe
 
+# generate a weekly meal plan from the user's library
+@app.post("/api/meal-plan")
+def create_meal_plan(req: MealPlanRequest, db: Session = Depends(get_read_db), current_user: UserDB = Depends(get_current_user)):
+    library = load_library(
+        db,
+        current_user.id,
+        cookbook_ids=req.cookbook_ids,
+        max_time_per_day=req.max_time_per_day,
+        no_repeat_weeks=req.no_repeat_weeks,
+    )
+    return plan_meals(library, days=req.days, overlap_weight=req.overlap_weight)
+
 # Delete a specific recipe
 @app.delete("/api/recipes/{id}")
 def delete_recipe(id: int, db: Session = Depends(get_db), current_user: UserDB = Depends(get_current_user)):
@@ -291,7 +410,13 @@ def delete_recipe(id: int, db: Session = Depends(get_db), current_user: UserDB =
     if not recipe:
         raise HTTPException(status_code=404, detail="Rezept nicht gefunden")
     
+    before = recipe_facts(recipe)
+    cookbook_ids = [cb.id for cb in recipe.cookbooks]
+
     db.delete(recipe)
+    record_recipe_change(db, current_user.id, before, None)
+    for cb_id in cookbook_ids:
+        record_cookbook_membership(db, current_user.id, cb_id, -1)
     db.commit()
     return {"message": "Rezept erfolgreich gelöscht"}
 
@@ -299,7 +424,7 @@ def delete_recipe(id: int, db: Session = Depends(get_db), current_user: UserDB =
 # for cookbooks
 # list all cookbooks of current user
 @app.get("/api/cookbooks")
-def get_cookbooks(db: Session = Depends(get_db), current_user: UserDB = Depends(get_current_user)):
+def get_cookbooks(db: Session = Depends(get_read_db), current_user: UserDB = Depends(get_current_user)):
     return db.query(CookbookDB).options(joinedload(CookbookDB.recipes)).filter(
         CookbookDB.owner_id == current_user.id
     ).all()
@@ -309,6 +434,8 @@ def get_cookbooks(db: Session = Depends(get_db), current_user: UserDB = Depends(
 def create_cookbook(data: dict, db: Session = Depends(get_db), current_user: UserDB = Depends(get_current_user)):
     new_cb = CookbookDB(name=data["name"], owner_id=current_user.id)
     db.add(new_cb)
+    db.flush()  # id für die Statistik
+    record_cookbook(db, current_user.id, new_cb)
     db.commit()
     return new_cb
 
@@ -329,6 +456,7 @@ def delete_cookbook(
         raise HTTPException(status_code=404, detail="Cookbook not found or access denied")
 
     db.delete(cookbook)
+    record_cookbook(db, current_user.id, cookbook, deleted=True)
     db.commit()
     
     return {"message": "Cookbook deleted successfully"}
@@ -342,6 +470,7 @@ def add_recipe_to_cookbook(cb_id: int, r_id: int, db: Session = Depends(get_db),
     
     if recipe not in cb.recipes:
         cb.recipes.append(recipe)
+        record_cookbook_membership(db, current_user.id, cb.id, +1)
         db.commit()
     return {"status": "added"}
 
@@ -352,6 +481,7 @@ def remove_recipe_from_cookbook(cb_id: int, r_id: int, db: Session = Depends(get
     recipe = next((r for r in cb.recipes if r.id == r_id), None)
     if recipe:
         cb.recipes.remove(recipe)
+        record_cookbook_membership(db, current_user.id, cb.id, -1)
         db.commit()
     return {"status": "removed"}
 
@@ -359,7 +489,7 @@ def remove_recipe_from_cookbook(cb_id: int, r_id: int, db: Session = Depends(get
 @app.get("/api/cookbooks/{cookbook_id}")
 def get_cookbook_detail(
     cookbook_id: int, 
-    db: Session = Depends(get_db), 
+    db: Session = Depends(get_read_db), 
     current_user: UserDB = Depends(get_current_user)
 ):
     # Wichtig: joinedload nutzen, damit die Rezepte direkt mitgeladen werden
@@ -0,0 +1,247 @@
+import argparse
+from typing import Optional
+from urllib.parse import urlsplit
+
+from sqlalchemy import event, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import flag_modified
+
+from .db_models import CookbookDB, RecipeDB, UserStatsDB, cookbook_recipe_association
+
+
+# Kochzeit-Verteilung: (Obergrenze in Minuten, Label)
+TIME_BUCKETS = [(15, "0-15"), (30, "16-30"), (60, "31-60"), (120, "61-120")]
+TIME_BUCKET_LONG = "120+"
+TIME_BUCKET_UNKNOWN = "unknown"
+
+TOP_COOKED_SHOWN = 10
+TOP_COOKED_KEPT = 20   # Puffer, damit nach dem Löschen selten neu berechnet werden muss
+
+# Session.info-Key: User, deren Zeile in der laufenden Transaktion neu aufgebaut wurde
+_REBUILT = "user_stats_rebuilt"
+
+
+def time_bucket(total_time: Optional[int]) -> str:
+    if total_time is None:
+        return TIME_BUCKET_UNKNOWN
+    for limit, label in TIME_BUCKETS:
+        if total_time <= limit:
+            return label
+    return TIME_BUCKET_LONG
+
+
+def source_domain(url: Optional[str]) -> str:
+    if not url:
+        return "unknown"
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host or "unknown"
+
+
+def recipe_facts(recipe: RecipeDB) -> dict:
+    """Snapshot of everything the aggregates depend on; take it before changing a recipe."""
+    return {
+        "id": recipe.id,
+        "title": recipe.title,
+        "rating": recipe.rating or 0,
+        "cook_count": recipe.cook_count or 0,
+        "time_bucket": time_bucket(recipe.total_time),
+        "domain": source_domain(recipe.original_url),
+    }
+
+
+def _empty_stats(user_id: int) -> UserStatsDB:
+    return UserStatsDB(
+        user_id=user_id, recipe_count=0, rating_sum=0, rated_count=0, cook_count=0,
+        time_buckets={}, domains={}, cookbooks={}, top_cooked=[],
+    )
+
+
+def _add_count(counts: dict, key: str, delta: int):
+    counts[key] = counts.get(key, 0) + delta
+    if counts[key] <= 0:
+        del counts[key]
+
+
+def _apply(stats: UserStatsDB, facts: dict, sign: int):
+    stats.recipe_count += sign
+    stats.cook_count += sign * facts["cook_count"]
+    if facts["rating"] > 0:
+        stats.rating_sum += sign * facts["rating"]
+        stats.rated_count += sign
+    _add_count(stats.time_buckets, facts["time_bucket"], sign)
+    _add_count(stats.domains, facts["domain"], sign)
+
+
+def _update_top_cooked(stats: UserStatsDB, recipe_id: int, after: Optional[dict]) -> bool:
+    """Returns False if the kept list may now be incomplete."""
+    top = [entry for entry in stats.top_cooked if entry["id"] != recipe_id]
+    removed = len(top) < len(stats.top_cooked)
+    if after and after["cook_count"] > 0:
+        top.append({"id": recipe_id, "title": after["title"], "cook_count": after["cook_count"]})
+        top.sort(key=lambda entry: (-entry["cook_count"], entry["id"]))
+    stats.top_cooked = top[:TOP_COOKED_KEPT]
+    return not (removed and after is None and len(stats.top_cooked) == TOP_COOKED_KEPT - 1)
+
+
+def _top_cooked_query(db: Session, user_id: int) -> list:
+    rows = db.query(RecipeDB.id, RecipeDB.title, RecipeDB.cook_count).filter(
+        RecipeDB.owner_id == user_id, RecipeDB.cook_count > 0
+    ).order_by(RecipeDB.cook_count.desc(), RecipeDB.id).limit(TOP_COOKED_KEPT)
+    return [{"id": r.id, "title": r.title, "cook_count": r.cook_count} for r in rows]
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_rebuilt(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_REBUILT, None)
+
+
+def _stats_for_update(db: Session, user_id: int) -> Optional[UserStatsDB]:
+    """
+    The user's aggregate row, locked for this transaction. None if the row
+    was built from the current state in this transaction: that state already
+    contains the change, so the caller must not apply its delta. This holds
+    for every later call in the same transaction, which rebuilds again
+    instead of applying deltas to the fresh row.
+    """
+    rebuilt = db.info.setdefault(_REBUILT, set())
+    if user_id in rebuilt:
+        db.flush()
+        rebuild_stats(db, user_id)
+        return None
+
+    # FOR UPDATE: parallele Requests desselben Users sollen sich keine Updates überschreiben
+    query = db.query(UserStatsDB).filter(UserStatsDB.user_id == user_id).with_for_update()
+    stats = query.first()
+    if stats is not None:
+        return stats
+
+    db.flush()
+    try:
+        with db.begin_nested():
+            rebuild_stats(db, user_id)
+    except IntegrityError:
+        # Ein paralleler Request hat die Zeile gerade angelegt (ohne unsere Änderung)
+        return query.first()
+    rebuilt.add(user_id)
+    return None
+
+
+def _mark_modified(stats: UserStatsDB):
+    for field in ("time_buckets", "domains", "cookbooks", "top_cooked"):
+        flag_modified(stats, field)
+
+
+def record_recipe_change(db: Session, user_id: int, before: Optional[dict], after: Optional[dict]):
+    """
+    Update the aggregates for one recipe: `before` None = imported,
+    `after` None = deleted, both = changed. Call after the change has been
+    applied to the session; the caller commits.
+    """
+    stats = _stats_for_update(db, user_id)
+    if stats is None:
+        return
+    if before:
+        _apply(stats, before, -1)
+    if after:
+        _apply(stats, after, +1)
+
+    recipe_id = (after or before)["id"]
+    if recipe_id is not None and not _update_top_cooked(stats, recipe_id, after):
+        db.flush()
+        stats.top_cooked = _top_cooked_query(db, user_id)
+    _mark_modified(stats)
+
+
+def record_cookbook(db: Session, user_id: int, cookbook: CookbookDB, deleted: bool = False):
+    stats = _stats_for_update(db, user_id)
+    if stats is None:
+        return
+    if deleted:
+        stats.cookbooks.pop(str(cookbook.id), None)
+    else:
+        stats.cookbooks[str(cookbook.id)] = {"name": cookbook.name, "count": 0}
+    _mark_modified(stats)
+
+
+def record_cookbook_membership(db: Session, user_id: int, cookbook_id: int, delta: int):
+    stats = _stats_for_update(db, user_id)
+    if stats is None:
+        return
+    entry = stats.cookbooks.get(str(cookbook_id))
+    if entry is not None:
+        entry["count"] = max(0, entry["count"] + delta)
+    _mark_modified(stats)
+
+
+def rebuild_stats(db: Session, user_id: int) -> UserStatsDB:
+    """Recompute a user's aggregates from scratch (full scan of recipes and cookbook_recipe)."""
+    stats = db.query(UserStatsDB).filter(UserStatsDB.user_id == user_id).with_for_update().first()
+    if stats is None:
+        stats = _empty_stats(user_id)
+        db.add(stats)
+    else:
+        fresh = _empty_stats(user_id)
+        for field in ("recipe_count", "rating_sum", "rated_count", "cook_count",
+                      "time_buckets", "domains", "cookbooks", "top_cooked"):
+            setattr(stats, field, getattr(fresh, field))
+
+    rows = db.query(
+        RecipeDB.id, RecipeDB.title, RecipeDB.rating, RecipeDB.cook_count, RecipeDB.total_time, RecipeDB.original_url
+    ).filter(RecipeDB.owner_id == user_id)
+    for row in rows:
+        _apply(stats, recipe_facts(row), +1)
+
+    counts = dict(
+        db.query(cookbook_recipe_association.c.cookbook_id, func.count())
+        .group_by(cookbook_recipe_association.c.cookbook_id)
+        .join(CookbookDB, CookbookDB.id == cookbook_recipe_association.c.cookbook_id)
+        .filter(CookbookDB.owner_id == user_id)
+    )
+    stats.cookbooks = {
+        str(cb_id): {"name": name, "count": counts.get(cb_id, 0)}
+        for cb_id, name in db.query(CookbookDB.id, CookbookDB.name).filter(CookbookDB.owner_id == user_id)
+    }
+    stats.top_cooked = _top_cooked_query(db, user_id)
+    _mark_modified(stats)
+    return stats
+
+
+def stats_response(stats: UserStatsDB) -> dict:
+    return {
+        "recipe_count": stats.recipe_count,
+        "average_rating": round(stats.rating_sum / stats.rated_count, 2) if stats.rated_count else None,
+        "total_times_cooked": stats.cook_count,
+        "cookbooks": sorted(
+            ({"id": int(cb_id), **entry} for cb_id, entry in stats.cookbooks.items()),
+            key=lambda cb: cb["name"] or "",
+        ),
+        "most_cooked": stats.top_cooked[:TOP_COOKED_SHOWN],
+        "time_distribution": {
+            label: stats.time_buckets.get(label, 0)
+            for label in [label for _, label in TIME_BUCKETS] + [TIME_BUCKET_LONG, TIME_BUCKET_UNKNOWN]
+        },
+        "imports_per_domain": dict(sorted(stats.domains.items(), key=lambda item: -item[1])),
+    }
+
+
+if __name__ == "__main__":
+    # z.B.: python -m api.library_stats            (alle User)
+    #       python -m api.library_stats --user 42
+    from .db_models import UserDB
+    from .index import SessionLocal
+
+    arg_parser = argparse.ArgumentParser(description="Rebuild per-user library statistics.")
+    arg_parser.add_argument("--user", type=int, help="only this user id")
+    args = arg_parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user_ids = [args.user] if args.user else [user_id for (user_id,) in db.query(UserDB.id)]
+        for user_id in user_ids:
+            rebuild_stats(db, user_id)
+            db.commit()
+            print(f"rebuilt stats for user {user_id}")
+    finally:
+        db.close()
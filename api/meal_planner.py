@@ -0,0 +1,141 @@
+import datetime
+from array import array
+from typing import List, Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from .db_models import RecipeDB, cookbook_recipe_association
+from .recipe_scraper import normalize_ingredient
+
+
+def ingredient_keys(ingredients_str: Optional[str]) -> tuple:
+    keys = []
+    for line in (ingredients_str or "").split("|"):
+        key = normalize_ingredient(line)
+        if key and key not in keys:
+            keys.append(key)
+    return tuple(keys)
+
+
+def index_ingredients(recipe: RecipeDB):
+    """Store the normalized ingredient keys on the recipe; call whenever ingredients_str changes."""
+    recipe.ingredient_keys = "|".join(ingredient_keys(recipe.ingredients_str))
+
+
+class RecipeLibrary:
+    """
+    Compact, array-based view of a user's recipes for the meal-plan solver.
+    Recipes are addressed by their position; ingredients are interned to ints
+    and indexed in both directions (recipe -> ingredients, ingredient -> recipes).
+    """
+
+    def __init__(self):
+        self.ids = array("l")
+        self.titles: List[str] = []
+        self.total_times = array("l")   # -1 = unbekannt
+        self.ratings = array("l")
+        self.ingredients: List[tuple] = []
+        self.postings: List[List[int]] = []
+        self.ingredient_names: List[str] = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from (id, title, total_time, rating, ingredient_keys) tuples."""
+        library = cls()
+        ingredient_index = {}
+        for pos, (recipe_id, title, total_time, rating, keys) in enumerate(rows):
+            library.ids.append(recipe_id)
+            library.titles.append(title)
+            library.total_times.append(total_time if total_time is not None else -1)
+            library.ratings.append(rating or 0)
+
+            recipe_ingredients = []
+            for key in keys.split("|") if keys else ():
+                idx = ingredient_index.get(key)
+                if idx is None:
+                    idx = ingredient_index[key] = len(library.ingredient_names)
+                    library.ingredient_names.append(key)
+                    library.postings.append([])
+                library.postings[idx].append(pos)
+                recipe_ingredients.append(idx)
+            library.ingredients.append(tuple(recipe_ingredients))
+        return library
+
+
+def load_library(
+    db: Session,
+    owner_id: int,
+    cookbook_ids: Optional[List[int]] = None,
+    max_time_per_day: Optional[int] = None,
+    no_repeat_weeks: int = 0,
+    now: Optional[datetime.datetime] = None,
+) -> RecipeLibrary:
+    # Eine einzige Query, nur die Spalten die der Solver braucht (keine ORM-Objekte).
+    # Harte Constraints werden direkt in SQL gefiltert, die Zutaten sind schon normalisiert.
+    query = db.query(
+        RecipeDB.id, RecipeDB.title, RecipeDB.total_time, RecipeDB.rating, RecipeDB.ingredient_keys
+    ).filter(RecipeDB.owner_id == owner_id)
+
+    if cookbook_ids:
+        query = query.filter(RecipeDB.id.in_(
+            select(cookbook_recipe_association.c.recipe_id).where(
+                cookbook_recipe_association.c.cookbook_id.in_(cookbook_ids)
+            )
+        ))
+
+    if max_time_per_day is not None:
+        # Rezepte ohne Zeitangabe fallen hier raus (NULL <= x ist nie wahr)
+        query = query.filter(RecipeDB.total_time <= max_time_per_day)
+
+    if no_repeat_weeks > 0:
+        cutoff = (now or datetime.datetime.utcnow()) - datetime.timedelta(weeks=no_repeat_weeks)
+        query = query.filter(or_(RecipeDB.last_cooked.is_(None), RecipeDB.last_cooked < cutoff))
+
+    return RecipeLibrary.from_rows(query.order_by(RecipeDB.id).all())
+
+
+def plan_meals(library: RecipeLibrary, days: int = 7, overlap_weight: float = 1.0) -> dict:
+    """
+    Greedy selection of `days` recipes. Each recipe's score is its rating plus
+    `overlap_weight` for every ingredient it shares with the recipes picked so far,
+    so the plan drifts towards a short shopping list. Scores are updated
+    incrementally through the ingredient postings, never recomputed per pick.
+    """
+    n = len(library)
+    scores = array("d", library.ratings)
+    covered = set()
+    chosen = []
+
+    for _ in range(min(days, n)):
+        best = max(range(n), key=scores.__getitem__)
+        chosen.append(best)
+        scores[best] = float("-inf")
+        for ing in library.ingredients[best]:
+            if ing in covered:
+                continue
+            covered.add(ing)
+            for pos in library.postings[ing]:
+                scores[pos] += overlap_weight
+
+    usage = {}
+    for pos in chosen:
+        for ing in library.ingredients[pos]:
+            usage[ing] = usage.get(ing, 0) + 1
+
+    return {
+        "recipes": [
+            {
+                "id": library.ids[pos],
+                "title": library.titles[pos],
+                "total_time": library.total_times[pos] if library.total_times[pos] >= 0 else None,
+                "rating": library.ratings[pos],
+            }
+            for pos in chosen
+        ],
+        "shopping_list": sorted(library.ingredient_names[ing] for ing in usage),
+        "shared_ingredients": sum(1 for count in usage.values() if count > 1),
+    }
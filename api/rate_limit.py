@@ -0,0 +1,148 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from .db_models import RateLimitBucketDB
+
+
+def _refill(tokens: float, updated_at: float, now: float, rate: float, capacity: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+
+def _consume(tokens: float, rate: float, cost: float):
+    """Returns (remaining tokens, retry_after seconds); retry_after 0 = allowed."""
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rate
+
+
+class InMemoryBackend:
+    """
+    Token buckets in this process only (default, e.g. a single uvicorn worker).
+    Buckets that have refilled completely are dropped, a missing bucket is full.
+    """
+
+    PRUNE_INTERVAL = 60.0
+
+    def __init__(self):
+        self._buckets: Dict[str, tuple] = {}   # key -> (tokens, updated_at, full_at)
+        self._lock = threading.Lock()
+        self._next_prune = 0.0
+
+    def take(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        now = time.time()
+        with self._lock:
+            # Host-Keys kommen aus User-URLs: ohne Aufräumen wächst das Dict unbegrenzt
+            if now >= self._next_prune:
+                self._buckets = {k: b for k, b in self._buckets.items() if b[2] > now}
+                self._next_prune = now + self.PRUNE_INTERVAL
+            tokens, updated_at, _ = self._buckets.get(key, (capacity, now, now))
+            tokens, retry_after = _consume(_refill(tokens, updated_at, now, rate, capacity), rate, cost)
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+        return retry_after
+
+
+class SQLBackend:
+    """
+    Token buckets in the database, shared by all workers (row lock per bucket).
+    Only atomic on Postgres: SQLite ignores FOR UPDATE, so concurrent workers
+    can overwrite each other's update there.
+    """
+
+    def __init__(self, engine):
+        self.Session = sessionmaker(bind=engine)
+
+    def take(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        for _ in range(2):  # 2. Versuch, falls ein anderer Worker den Bucket gleichzeitig anlegt
+            now = time.time()
+            db = self.Session()
+            try:
+                bucket = db.query(RateLimitBucketDB).filter(RateLimitBucketDB.key == key).with_for_update().first()
+                if bucket is None:
+                    bucket = RateLimitBucketDB(key=key, tokens=capacity, updated_at=now)
+                    db.add(bucket)
+                tokens, retry_after = _consume(
+                    _refill(bucket.tokens, bucket.updated_at, now, rate, capacity), rate, cost
+                )
+                bucket.tokens = tokens
+                bucket.updated_at = now
+                db.commit()
+                return retry_after
+            except IntegrityError:
+                db.rollback()
+            finally:
+                db.close()
+        # Weiterhin Konflikt: nicht durchlassen, sondern in Kürze erneut versuchen lassen
+        return cost / rate
+
+
+class RateLimiter:
+    """Token bucket: `capacity` requests burst, refilled at `per_minute` per minute."""
+
+    def __init__(self, backend, name: str, per_minute: float, capacity: float):
+        self.backend = backend
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.capacity = capacity
+
+    def hit(self, key) -> float:
+        """Consume one token for `key`. Returns seconds to wait, 0 if allowed."""
+        return self.backend.take(f"{self.name}:{key}", self.rate, self.capacity)
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key: the first caller runs the
+    function, everyone arriving while it runs gets the same result (or exception).
+    """
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error: Optional[BaseException] = None
+
+    def __init__(self):
+        self._calls: Dict[str, "SingleFlight._Call"] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref"}
+
+
+def canonical_url(url: str) -> str:
+    """Normalized URL for coalescing: lowercase host, no fragment, no tracking params."""
+    parts = urlsplit(url.strip())
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.startswith("utm_") and k not in TRACKING_PARAMS
+    ]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(sorted(query)), ""))
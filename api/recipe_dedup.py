@@ -0,0 +1,175 @@
+import hashlib
+import random
+import re
+import struct
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .db_models import RecipeDB, RecipeLSHBucketDB
+from .recipe_scraper import normalize_ingredient
+
+
+# 64 Hashfunktionen in 16 Bändern à 4 Zeilen -> Kandidat ab ca. 50% Jaccard-Ähnlichkeit
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+DUPLICATE_THRESHOLD = 0.6
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(1337)  # feste Seeds: Signaturen müssen über Prozesse hinweg stabil sein
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME)) for _ in range(NUM_PERM)
+]
+_SIGNATURE_FORMAT = "<%dI" % NUM_PERM
+
+
+def recipe_tokens(title: Optional[str], ingredients_str: Optional[str]) -> set:
+    """Normalized title words plus normalized ingredient keys."""
+    tokens = {"t:" + w for w in re.findall(r"[^\W\d_]+", (title or "").lower()) if len(w) > 2}
+    for line in (ingredients_str or "").split("|"):
+        key = normalize_ingredient(line)
+        if key:
+            tokens.add("i:" + key)
+    return tokens
+
+
+def _token_hash(token: str) -> int:
+    # stabiler Hash (Pythons hash() ist pro Prozess randomisiert)
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def minhash(tokens: set) -> List[int]:
+    signature = [_MAX_HASH] * NUM_PERM
+    for token in tokens:
+        x = _token_hash(token)
+        for i, (a, b) in enumerate(_PERMUTATIONS):
+            h = ((a * x + b) % _MERSENNE_PRIME) & _MAX_HASH
+            if h < signature[i]:
+                signature[i] = h
+    return signature
+
+
+def recipe_signature(title: Optional[str], ingredients_str: Optional[str]) -> Optional[List[int]]:
+    """MinHash signature, or None if there is nothing to compare (no ingredients, only short title words)."""
+    tokens = recipe_tokens(title, ingredients_str)
+    # Leere Menge ergäbe lauter _MAX_HASH: alle solchen Rezepte wären "identisch"
+    return minhash(tokens) if tokens else None
+
+
+def encode_signature(signature: List[int]) -> str:
+    return struct.pack(_SIGNATURE_FORMAT, *signature).hex()
+
+
+def decode_signature(value: str) -> List[int]:
+    return list(struct.unpack(_SIGNATURE_FORMAT, bytes.fromhex(value)))
+
+
+def band_buckets(signature: List[int]) -> List[int]:
+    # Die Bandnummer fließt in den Hash ein, so reicht ein einziges "bucket IN (...)"
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack("<I%dI" % ROWS, band, *rows), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))
+    return buckets
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_PERM
+
+
+def index_recipe(recipe: RecipeDB, signature: Optional[List[int]] = None) -> Optional[List[int]]:
+    """Store signature and LSH buckets on the recipe (caller commits)."""
+    if signature is None:
+        signature = recipe_signature(recipe.title, recipe.ingredients_str)
+    if signature is None:
+        recipe.minhash_signature = None
+        recipe.lsh_buckets = []
+        return None
+    recipe.minhash_signature = encode_signature(signature)
+    # Bestehende Zeilen aktualisieren statt ersetzen (sonst PK-Konflikt beim Flush)
+    existing = {row.band: row for row in recipe.lsh_buckets}
+    for band, bucket in enumerate(band_buckets(signature)):
+        if band in existing:
+            existing[band].bucket = bucket
+        else:
+            recipe.lsh_buckets.append(RecipeLSHBucketDB(band=band, bucket=bucket, owner_id=recipe.owner_id))
+    return signature
+
+
+def find_similar(db: Session, owner_id: int, signature: List[int], exclude_id: Optional[int] = None) -> List[dict]:
+    """Recipes of this user that likely duplicate `signature` (LSH lookup, no full scan)."""
+    candidate_ids = {
+        recipe_id for (recipe_id,) in db.query(RecipeLSHBucketDB.recipe_id).filter(
+            RecipeLSHBucketDB.owner_id == owner_id,
+            RecipeLSHBucketDB.bucket.in_(band_buckets(signature)),
+        ).distinct()
+    }
+    candidate_ids.discard(exclude_id)
+    if not candidate_ids:
+        return []
+
+    matches = []
+    rows = db.query(RecipeDB.id, RecipeDB.title, RecipeDB.minhash_signature).filter(
+        RecipeDB.id.in_(candidate_ids)
+    )
+    for recipe_id, title, encoded in rows:
+        score = similarity(signature, decode_signature(encoded))
+        if score >= DUPLICATE_THRESHOLD:
+            matches.append({"id": recipe_id, "title": title, "similarity": round(score, 2)})
+    return sorted(matches, key=lambda m: m["similarity"], reverse=True)
+
+
+def find_duplicate_clusters(db: Session, owner_id: int) -> List[List[dict]]:
+    """
+    Groups of likely duplicates across the whole library. Only recipes sharing
+    an LSH bucket are compared: each bucket member against the bucket's first
+    member, verified against the threshold and merged with union-find.
+    """
+    colliding = db.query(RecipeLSHBucketDB.bucket).filter(
+        RecipeLSHBucketDB.owner_id == owner_id
+    ).group_by(RecipeLSHBucketDB.bucket).having(func.count() > 1)
+
+    buckets: Dict[int, List[int]] = {}
+    for bucket, recipe_id in db.query(RecipeLSHBucketDB.bucket, RecipeLSHBucketDB.recipe_id).filter(
+        RecipeLSHBucketDB.owner_id == owner_id,
+        RecipeLSHBucketDB.bucket.in_(colliding),
+    ):
+        buckets.setdefault(bucket, []).append(recipe_id)
+    if not buckets:
+        return []
+
+    candidate_ids = {recipe_id for members in buckets.values() for recipe_id in members}
+    recipes = {
+        recipe_id: (title, decode_signature(encoded))
+        for recipe_id, title, encoded in db.query(
+            RecipeDB.id, RecipeDB.title, RecipeDB.minhash_signature
+        ).filter(RecipeDB.id.in_(candidate_ids))
+    }
+
+    parent = {recipe_id: recipe_id for recipe_id in recipes}
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    # Pro Bucket nur gegen einen Repräsentanten vergleichen: linear in der Bucket-Größe,
+    # auch wenn ein User hunderte Kopien desselben Rezepts hat
+    for members in buckets.values():
+        representative = members[0]
+        for other in members[1:]:
+            if find(other) == find(representative):
+                continue
+            if similarity(recipes[representative][1], recipes[other][1]) >= DUPLICATE_THRESHOLD:
+                parent[find(other)] = find(representative)
+
+    clusters: Dict[int, List[dict]] = {}
+    for recipe_id, (title, _) in recipes.items():
+        clusters.setdefault(find(recipe_id), []).append({"id": recipe_id, "title": title})
+    return [sorted(c, key=lambda r: r["id"]) for c in clusters.values() if len(c) > 1]
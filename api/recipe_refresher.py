@@ -0,0 +1,279 @@
+import argparse
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+from sqlalchemy.orm import Session
+
+from .db_models import RecipeDB
+from .library_stats import recipe_facts, record_recipe_change
+from .meal_planner import index_ingredients
+from .recipe_dedup import index_recipe
+from .recipe_scraper import parse_jsonld
+
+
+REFRESH_USER_AGENT = "recipe-lib-refresher/1.0"
+
+# Felder, die aus der Quelle übernommen werden (Notizen, Rating etc. bleiben unangetastet)
+REFRESHABLE_FIELDS = (
+    "title", "description", "image_url", "ingredients_str", "instructions",
+    "prep_time", "cook_time", "total_time", "yields",
+)
+# Werden auch geleert, wenn die Quelle sie entfernt (gelöschtes Bild -> kein kaputter Link)
+CLEARABLE_FIELDS = ("image_url",)
+
+
+class _HostSlot:
+    """Per-host politeness: limits parallel requests and spacing between them."""
+
+    def __init__(self, concurrency: int):
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.lock = threading.Lock()
+        self.robots_lock = threading.Lock()
+        self.next_request = 0.0
+
+
+class RecipeRefresher:
+    """
+    Revisits the original_url of stale recipes, oldest first, with conditional
+    requests (ETag / Last-Modified) and writes back only fields that changed.
+
+    A run stops after `max_recipes` URLs or `time_budget` seconds, whichever
+    comes first, so it can be scheduled next to interactive traffic. Requests
+    that could not finish (incl. `timeout`) within the budget are not started,
+    and each URL group is committed as soon as it is processed.
+
+    robots.txt and the per-host spacing are kept per run: each host's
+    robots.txt is fetched once per run, nothing is cached between runs.
+    """
+
+    def __init__(
+        self,
+        http: Optional[requests.Session] = None,
+        max_recipes: int = 50,
+        time_budget: float = 8.0,
+        min_age: datetime.timedelta = datetime.timedelta(days=7),
+        host_delay: float = 2.0,
+        host_concurrency: int = 1,
+        workers: int = 4,
+        timeout: float = 5.0,
+    ):
+        self.http = http or requests.Session()
+        self.http.headers["User-Agent"] = REFRESH_USER_AGENT
+        self.max_recipes = max_recipes
+        self.time_budget = time_budget
+        self.min_age = min_age
+        self.host_delay = host_delay
+        self.host_concurrency = host_concurrency
+        self.workers = workers
+        self.timeout = timeout
+
+        self._hosts: Dict[str, _HostSlot] = {}
+        self._hosts_lock = threading.Lock()
+        self._robots: Dict[str, RobotFileParser] = {}
+        self._deadline = 0.0
+
+    # --- politeness ---
+
+    def _slot(self, origin: str) -> _HostSlot:
+        with self._hosts_lock:
+            if origin not in self._hosts:
+                self._hosts[origin] = _HostSlot(self.host_concurrency)
+            return self._hosts[origin]
+
+    @contextmanager
+    def _host_request(self, origin: str, delay: float):
+        # Wartet auf einen freien Slot für den Host; False = Budget reicht nicht mehr.
+        # Ein Request wird nur gestartet, wenn er auch im Timeout-Fall vor der Deadline endet.
+        slot = self._slot(origin)
+        with slot.semaphore:
+            with slot.lock:
+                start = max(time.monotonic(), slot.next_request)
+                slot.next_request = start + delay
+            if start + self.timeout > self._deadline:
+                yield False
+                return
+            time.sleep(max(0.0, start - time.monotonic()))
+            yield True
+
+    def _robots_for(self, origin: str) -> Optional[RobotFileParser]:
+        # Ein robots.txt-Abruf pro Host, auch wenn mehrere Worker gleichzeitig anfragen
+        with self._slot(origin).robots_lock:
+            if origin in self._robots:
+                return self._robots[origin]
+
+            parser = RobotFileParser(origin + "/robots.txt")
+            try:
+                with self._host_request(origin, self.host_delay) as allowed:
+                    if not allowed:
+                        return None
+                    response = self.http.get(origin + "/robots.txt", timeout=self.timeout)
+                if response.status_code in (401, 403):
+                    parser.disallow_all = True
+                elif response.status_code >= 400:
+                    parser.allow_all = True
+                else:
+                    parser.parse(response.text.splitlines())
+            except requests.RequestException:
+                # Host nicht erreichbar: der eigentliche Abruf schlägt dann ohnehin fehl
+                parser.allow_all = True
+
+            self._robots[origin] = parser
+            return parser
+
+    # --- fetching ---
+
+    def fetch(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> dict:
+        """Fetch one URL politely. Returns a dict with `status` and, if changed, `data`."""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+
+        robots = self._robots_for(origin)
+        if robots is None:
+            return {"status": "skipped"}
+        if not robots.can_fetch(REFRESH_USER_AGENT, url):
+            return {"status": "blocked"}
+        delay = max(self.host_delay, robots.crawl_delay(REFRESH_USER_AGENT) or 0)
+
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        try:
+            with self._host_request(origin, delay) as allowed:
+                if not allowed:
+                    return {"status": "skipped"}
+                response = self.http.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            return {"status": "error", "error": str(e)}
+
+        if response.status_code == 304:
+            return {"status": "not_modified"}
+        if response.status_code >= 400:
+            return {"status": "error", "error": f"HTTP {response.status_code}"}
+
+        try:
+            data = parse_jsonld(response.content, url)
+        except Exception as e:
+            return {"status": "error", "error": str(e)}
+        if not data:
+            return {"status": "error", "error": "No recipe found"}
+
+        return {
+            "status": "fetched",
+            "data": data,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+
+    # --- run ---
+
+    def stale_recipes(self, db: Session, now: datetime.datetime) -> Dict[str, List[RecipeDB]]:
+        """Stalest recipes grouped by URL, so a URL imported by several users is fetched once."""
+        recipes = db.query(RecipeDB).filter(
+            RecipeDB.original_url.isnot(None),
+            (RecipeDB.last_fetched.is_(None)) | (RecipeDB.last_fetched < now - self.min_age),
+        ).order_by(RecipeDB.last_fetched.asc().nulls_first(), RecipeDB.id).limit(self.max_recipes * 4).all()
+
+        groups: Dict[str, List[RecipeDB]] = {}
+        for recipe in recipes:
+            if recipe.original_url in groups or len(groups) < self.max_recipes:
+                groups.setdefault(recipe.original_url, []).append(recipe)
+        return groups
+
+    def run(self, db: Session, now: Optional[datetime.datetime] = None) -> dict:
+        now = now or datetime.datetime.utcnow()
+        self._deadline = time.monotonic() + self.time_budget
+        # Zustand pro Lauf: der Cron-Endpoint erzeugt ohnehin für jeden Lauf einen neuen Refresher
+        self._hosts = {}
+        self._robots = {}
+        groups = self.stale_recipes(db, now)
+        stats = {"checked": 0, "updated": 0, "not_modified": 0, "blocked": 0, "error": 0, "skipped": 0}
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {}
+            for url, recipes in groups.items():
+                # Conditional Request nur, wenn alle Kopien denselben Stand haben
+                etags = {r.etag for r in recipes}
+                modified = {r.http_last_modified for r in recipes}
+                futures[pool.submit(
+                    self.fetch,
+                    url,
+                    etags.pop() if len(etags) == 1 else None,
+                    modified.pop() if len(modified) == 1 else None,
+                )] = recipes
+
+            # DB-Zugriffe nur hier im aufrufenden Thread
+            for future in as_completed(futures):
+                result = future.result()
+                status = result["status"]
+                if status == "skipped":
+                    stats["skipped"] += 1
+                    continue
+
+                stats["checked"] += 1
+                stat_changes = []
+                for recipe in futures[future]:
+                    recipe.last_fetched = now
+                    if status == "fetched":
+                        recipe.etag = result["etag"]
+                        recipe.http_last_modified = result["last_modified"]
+                        before = recipe_facts(recipe)
+                        if self.apply_changes(recipe, result["data"]):
+                            stats["updated"] += 1
+                            if recipe.owner_id is not None:
+                                stat_changes.append((recipe.owner_id, before, recipe_facts(recipe)))
+                if status != "fetched":
+                    stats[status] += 1
+
+                # Statistik zuletzt: die user_stats-Zeilen (FOR UPDATE) sind nur bis zum
+                # Commit direkt danach gesperrt, interaktive Requests warten nicht auf den Lauf.
+                # Pro URL committen: ein abgebrochener Lauf behält, was schon erledigt ist
+                for owner_id, before, after in stat_changes:
+                    record_recipe_change(db, owner_id, before, after)
+                db.commit()
+
+        return stats
+
+    @staticmethod
+    def apply_changes(recipe: RecipeDB, data: dict) -> bool:
+        changed = {}
+        for field in REFRESHABLE_FIELDS:
+            value = data.get(field) or None
+            if value is None and field not in CLEARABLE_FIELDS:
+                continue  # leere Felder sind meist Parser-Lücken, nicht gewollt entfernt
+            if value != (getattr(recipe, field) or None):
+                changed[field] = value
+        for field, value in changed.items():
+            setattr(recipe, field, value)
+        if "title" in changed or "ingredients_str" in changed:
+            index_recipe(recipe)
+        if "ingredients_str" in changed:
+            index_ingredients(recipe)
+        return bool(changed)
+
+
+if __name__ == "__main__":
+    # z.B.: python -m api.recipe_refresher --max-recipes 200 --budget 60
+    from .index import SessionLocal
+
+    arg_parser = argparse.ArgumentParser(description="Refresh stale imported recipes.")
+    arg_parser.add_argument("--max-recipes", type=int, default=50)
+    arg_parser.add_argument("--budget", type=float, default=60.0, help="time budget in seconds")
+    arg_parser.add_argument("--host-delay", type=float, default=2.0)
+    args = arg_parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        refresher = RecipeRefresher(max_recipes=args.max_recipes, time_budget=args.budget, host_delay=args.host_delay)
+        print(refresher.run(db))
+    finally:
+        db.close()
@@ -43,6 +43,29 @@ def parse_iso_duration_to_minutes(duration_str):
     return total_minutes
 
 
+# Mengeneinheiten, die beim Normalisieren von Zutaten entfernt werden
+INGREDIENT_UNITS = {
+    "g", "kg", "mg", "ml", "l", "cl", "dl", "el", "tl", "msp", "prise", "prisen",
+    "stück", "stk", "pck", "päckchen", "dose", "dosen", "bund", "becher", "glas",
+    "scheibe", "scheiben", "zehe", "zehen", "etwas", "n", "b", "bed",
+    "tbsp", "tsp", "cup", "cups", "oz", "lb", "lbs", "pinch", "clove", "cloves",
+    "can", "cans", "slice", "slices", "handful", "of", "a", "an", "some",
+}
+
+
+def normalize_ingredient(line: str) -> str:
+    """
+    Reduce an ingredient line to a comparable key.
+    Example: '3 cloves Garlic' -> 'garlic', '200 g Mehl (Type 405)' -> 'mehl'
+    """
+    if not line:
+        return ""
+    line = re.sub(r"\(.*?\)", " ", line.lower())
+    line = line.split(",")[0]
+    words = [w for w in re.findall(r"[^\W\d_]+", line) if w not in INGREDIENT_UNITS]
+    return " ".join(words)
+
+
 def scrape_jsonld(url: str):
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) ...' 
@@ -54,7 +77,15 @@ def scrape_jsonld(url: str):
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Could not fetch URL: {str(e)}")
 
-    soup = BeautifulSoup(response.content, 'html.parser')
+    return parse_jsonld(response.content, url)
+
+
+def parse_jsonld(content: bytes, url: str):
+    """
+    Extract the schema.org Recipe from the JSON-LD of an HTML page.
+    Returns None if the page contains no recipe.
+    """
+    soup = BeautifulSoup(content, 'html.parser')
     
     # --- JSON-LD ---
     script = soup.find('script', {'type': 'application/ld+json'})
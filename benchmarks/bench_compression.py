@@ -0,0 +1,97 @@
+"""
+Size and latency of response compression (gzip / br / zstd) and of the
+compressed text columns, on a synthetic recipe list.
+
+Run from the project root:
+    python benchmarks/bench_compression.py
+"""
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+# Make project root importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.compressed_text import compress_text, decompress_text  # noqa: E402
+from api.compression import ENCODERS, brotli, zstandard  # noqa: E402
+
+RECIPES = 300
+ROUNDS = 20
+WORDS = (
+    "Zwiebeln Knoblauch fein würfeln und in Olivenöl glasig anschwitzen Tomaten hinzufügen "
+    "mit Salz Pfeffer abschmecken bei mittlerer Hitze zehn Minuten köcheln lassen Nudeln "
+    "in reichlich Salzwasser al dente kochen abgießen und mit der Soße vermengen Parmesan "
+    "darüber reiben sofort servieren Backofen auf 180 Grad vorheizen Teig ausrollen"
+).split()
+
+
+def sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def recipe_list():
+    rng = random.Random(7)
+    return [
+        {
+            "id": i,
+            "public_id": f"{rng.getrandbits(128):032x}",
+            "title": sentence(rng, 4),
+            "description": sentence(rng, 30),
+            "image_url": f"https://img.example.com/{rng.getrandbits(64):x}.jpg",
+            "ingredients_str": "|".join(f"{rng.randint(1, 500)} g {rng.choice(WORDS)}" for _ in range(10)),
+            "instructions": "\n\n".join(sentence(rng, 25) for _ in range(8)),
+            "notes": sentence(rng, 15) if i % 3 == 0 else None,
+            "rating": rng.randint(0, 5),
+            "total_time": rng.choice([20, 30, 45, 60]),
+        }
+        for i in range(RECIPES)
+    ]
+
+
+DECODERS = {"gzip": gzip.decompress}
+if brotli is not None:
+    DECODERS["br"] = brotli.decompress
+if zstandard is not None:
+    DECODERS["zstd"] = zstandard.ZstdDecompressor().decompress
+
+
+def median_ms(fn):
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return sorted(times)[ROUNDS // 2]
+
+
+def main():
+    recipes = recipe_list()
+    body = json.dumps(recipes).encode("utf-8")
+    print(f"GET /api/recipes with {RECIPES} recipes: {len(body) / 1024:.1f} KB uncompressed\n")
+    print(f"{'encoding':<10}{'size KB':>10}{'ratio':>8}{'compress ms':>14}{'decompress ms':>16}")
+    for name, encode in ENCODERS.items():
+        compressed = encode(body)
+        print(
+            f"{name:<10}{len(compressed) / 1024:>10.1f}{len(body) / len(compressed):>8.1f}"
+            f"{median_ms(lambda: encode(body)):>14.2f}{median_ms(lambda: DECODERS[name](compressed)):>16.2f}"
+        )
+
+    print("\nCompressedText columns (zlib + base64, values >= 512 chars)")
+    print(f"{'column':<14}{'plain KB':>10}{'stored KB':>11}{'write ms':>10}{'read ms':>9}")
+    for column in ("description", "instructions", "notes"):
+        values = [r[column] for r in recipes if r[column]]
+        stored = [compress_text(v) for v in values]
+        plain_size = sum(len(v.encode("utf-8")) for v in values)
+        stored_size = sum(len(v.encode("utf-8")) for v in stored)
+        print(
+            f"{column:<14}{plain_size / 1024:>10.1f}{stored_size / 1024:>11.1f}"
+            f"{median_ms(lambda: [compress_text(v) for v in values]):>10.2f}"
+            f"{median_ms(lambda: [decompress_text(v) for v in stored]):>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
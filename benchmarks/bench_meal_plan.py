@@ -0,0 +1,82 @@
+"""
+Benchmark for POST /api/meal-plan on a 10k recipe library.
+
+Run from the project root:
+    python benchmarks/bench_meal_plan.py
+"""
+import os
+import random
+import sys
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+# Make project root importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.db_models import Base, RecipeDB  # noqa: E402
+from api.meal_planner import index_ingredients, load_library, plan_meals  # noqa: E402
+
+LIBRARY_SIZE = 10000
+ROUNDS = 20
+TARGET_MS = 100
+UNITS = ["200 g", "1 EL", "2 TL", "3 cloves", "1 cup", "1 Prise", "500 ml", "2"]
+
+
+def seed(db, owner_id=1):
+    rng = random.Random(42)
+    # Zutatennamen ohne Ziffern, sonst kollabieren sie beim Normalisieren
+    vocab = [f"zutat {chr(97 + i // 26)}{chr(97 + i % 26)}" for i in range(600)] + ["salz", "pfeffer", "olivenöl", "zwiebel", "knoblauch"]
+    for i in range(LIBRARY_SIZE):
+        ingredients = rng.sample(vocab, rng.randint(5, 15))
+        recipe = RecipeDB(
+            title=f"Rezept {i}",
+            ingredients_str="|".join(f"{rng.choice(UNITS)} {ing}" for ing in ingredients),
+            total_time=rng.choice([None, 15, 20, 30, 45, 60, 90]),
+            rating=rng.randint(0, 5),
+            owner_id=owner_id,
+        )
+        index_ingredients(recipe)  # wie beim Import
+        db.add(recipe)
+    db.commit()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def end_to_end(db, **filters):
+    library, load_ms = timed(lambda: load_library(db, 1, **filters))
+    plan, solve_ms = timed(lambda: plan_meals(library, days=7))
+    return library, plan, load_ms, solve_ms
+
+
+def main():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed(db)
+
+    # Erster Request im frischen Prozess (Serverless-Kaltstart), ganze Bibliothek ohne Filter
+    library, plan, load_ms, solve_ms = end_to_end(db)
+    cold = load_ms + solve_ms
+    print(f"cold, full library ({len(library)} recipes): {cold:.1f} ms "
+          f"(load {load_ms:.1f}, solve {solve_ms:.1f}) -> {'OK' if cold < TARGET_MS else 'OVER'} {TARGET_MS} ms target")
+
+    for label, filters in (("full library", {}), ("max 60 min", {"max_time_per_day": 60})):
+        totals = []
+        for _ in range(ROUNDS):
+            library, plan, load_ms, solve_ms = end_to_end(db, **filters)
+            totals.append(load_ms + solve_ms)
+        totals.sort()
+        print(f"{label:<13} ({len(library)} recipes) end-to-end median/max: "
+              f"{totals[ROUNDS // 2]:.1f} / {totals[-1]:.1f} ms")
+
+    print(f"shared ingredients: {plan['shared_ingredients']}, shopping list: {len(plan['shopping_list'])}")
+
+
+if __name__ == "__main__":
+    main()
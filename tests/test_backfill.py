@@ -0,0 +1,80 @@
+import pytest
+import sqlalchemy as sa
+
+from api.backfill import checkpoints, run_backfill
+
+ROWS = 1000
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'backfill.db'}")
+    items = sa.Table(
+        "items", sa.MetaData(),
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("name", sa.String),
+        sa.Column("code", sa.String),
+        sa.Column("upper", sa.String),
+    )
+    items.create(engine)
+    with engine.begin() as conn:
+        conn.execute(items.insert(), [{"id": i, "name": f"item {i}", "code": f"c{i}"} for i in range(1, ROWS + 1)])
+    yield engine
+    engine.dispose()
+
+
+def upper_values(engine):
+    with engine.connect() as conn:
+        return dict(conn.execute(sa.text("SELECT id, upper FROM items")).fetchall())
+
+
+def test_interrupted_backfill_resumes_after_checkpoint(engine):
+    def crashing(row):
+        if row.id == 700:
+            raise RuntimeError("worker killed")
+        return {"upper": row.name.upper()}
+
+    with pytest.raises(RuntimeError):
+        run_backfill(engine, "upper", "items", ["name", "upper"], crashing, batch_size=250, log=lambda msg: None)
+
+    with engine.connect() as conn:
+        state = conn.execute(sa.select(checkpoints)).one()
+    assert (state.name, state.last_key, state.rows_done) == ("upper", 500, 500)
+    values = upper_values(engine)
+    assert all(values[i] == f"ITEM {i}" for i in range(1, 501))
+    assert all(values[i] is None for i in range(501, ROWS + 1))   # Batch 3 zurückgerollt
+
+    seen = []
+
+    def counting(row):
+        seen.append(row.id)
+        return {"upper": row.name.upper()}
+
+    stats = run_backfill(engine, "upper", "items", ["name", "upper"], counting, batch_size=250, log=lambda msg: None)
+
+    assert seen == list(range(501, ROWS + 1))
+    assert stats["rows"] == ROWS
+    assert all(value == f"ITEM {i}" for i, value in upper_values(engine).items())
+    with engine.connect() as conn:
+        assert conn.execute(sa.select(checkpoints)).fetchall() == []
+
+
+def test_unchanged_rows_and_on_batch(engine):
+    batches = []
+
+    def only_even(row):
+        return {"upper": row.name.upper()} if row.id % 2 == 0 else None
+
+    run_backfill(
+        engine, "even", "items", ["name", "upper"], only_even, batch_size=300,
+        log=lambda msg: None, on_batch=lambda conn, changed: batches.append([row.id for row, _ in changed]),
+    )
+
+    values = upper_values(engine)
+    assert values[1] is None and values[2] == "ITEM 2"
+    assert [len(batch) for batch in batches] == [150, 150, 150, 50]
+
+
+def test_non_integer_key_is_rejected(engine):
+    with pytest.raises(TypeError):
+        run_backfill(engine, "by_code", "items", ["upper"], lambda row: None, key_column="code", log=lambda msg: None)
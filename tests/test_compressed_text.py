@@ -0,0 +1,45 @@
+import pytest
+
+from api.compressed_text import COMPRESSED_PREFIX, ESCAPE_PREFIX, compress_text, decompress_text, escape_text
+from api.db_models import RecipeDB
+
+LONG = "Zwiebeln fein würfeln und in Olivenöl glasig anschwitzen. " * 20
+
+VALUES = [
+    None,
+    "",
+    "kurze Notiz",
+    LONG,
+    COMPRESSED_PREFIX + " hello",
+    COMPRESSED_PREFIX + LONG,
+    ESCAPE_PREFIX + "schon escaped",
+    ESCAPE_PREFIX + LONG,
+    "~z",
+    "~zebra",
+]
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_round_trip(value):
+    assert decompress_text(compress_text(value)) == value
+    assert decompress_text(escape_text(value)) == value
+
+
+def test_long_text_is_compressed_even_if_it_starts_with_the_marker():
+    stored = compress_text(COMPRESSED_PREFIX + LONG)
+    assert stored.startswith(COMPRESSED_PREFIX)
+    assert len(stored) < len(LONG)
+
+
+@pytest.mark.parametrize("flag", ["1", "0"])
+def test_column_round_trip(db, monkeypatch, flag):
+    monkeypatch.setenv("COMPRESS_RECIPE_TEXT", flag)
+    recipe = RecipeDB(title="Test", notes=COMPRESSED_PREFIX + " hello", instructions=LONG, description="~z0~x")
+    db.add(recipe)
+    db.commit()
+    db.expire_all()
+
+    recipe = db.query(RecipeDB).one()
+    assert recipe.notes == COMPRESSED_PREFIX + " hello"
+    assert recipe.instructions == LONG
+    assert recipe.description == "~z0~x"
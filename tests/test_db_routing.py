@@ -0,0 +1,90 @@
+import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.db_models import Base, RecipeDB, UserDB
+from api.db_routing import ReadWriteRouter
+
+
+def make_engine(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def databases(tmp_path):
+    primary = make_engine(tmp_path / "primary.db")
+    replica = make_engine(tmp_path / "replica.db")
+    for engine in (primary, replica):
+        with sessionmaker(bind=engine)() as db:
+            db.add(UserDB(id=1, email="test@example.com"))
+            db.commit()
+    yield sessionmaker(autocommit=False, autoflush=False, bind=primary), replica
+    primary.dispose()
+    replica.dispose()
+
+
+def load_user(db):
+    return db.query(UserDB).filter(UserDB.id == 1).one()
+
+
+def test_reads_go_to_the_replica(databases):
+    primary, replica = databases
+    router = ReadWriteRouter(primary, replica)
+
+    with primary() as db:
+        user = load_user(db)
+        session = router.read_session(user)
+        assert session.get_bind() is replica
+        session.close()
+
+
+def test_own_writes_are_read_from_the_primary(databases):
+    primary, replica = databases
+    router = ReadWriteRouter(primary, replica, sticky_seconds=10)
+
+    with primary() as db:
+        user = load_user(db)
+        db.info["current_user"] = user
+        db.add(RecipeDB(title="Neu", owner_id=user.id))
+        db.commit()
+        assert user.last_write_at is not None
+
+        session = router.read_session(user)
+        assert session.get_bind() is primary.kw["bind"]
+        session.close()
+
+        # Nach sticky_seconds wieder von der Replica
+        user.last_write_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=11)
+        session = router.read_session(user)
+        assert session.get_bind() is replica
+        session.close()
+
+
+def test_writes_of_other_sessions_do_not_make_reads_sticky(databases):
+    primary, replica = databases
+    router = ReadWriteRouter(primary, replica)
+
+    with primary() as db:
+        db.add(RecipeDB(title="Neu", owner_id=1))   # ohne current_user, z.B. Cron
+        db.commit()
+        user = load_user(db)
+        assert user.last_write_at is None
+
+        session = router.read_session(user)
+        assert session.get_bind() is replica
+        session.close()
+
+
+def test_unreachable_replica_falls_back_to_the_primary(databases):
+    primary, _ = databases
+    broken = create_engine("sqlite:////nonexistent/dir/r.db")
+    router = ReadWriteRouter(primary, broken)
+
+    session = router.read_session()
+    assert session.get_bind() is primary.kw["bind"]
+    session.close()
+    assert router.replica_available() is False   # bleibt für retry_after markiert
@@ -0,0 +1,107 @@
+import copy
+
+from api.db_models import CookbookDB, RecipeDB, UserDB, UserStatsDB
+from api.library_stats import (
+    rebuild_stats, recipe_facts, record_cookbook_membership, record_recipe_change, stats_response,
+)
+
+
+def setup_user(db, cookbooks=("Pasta", "Schnell")):
+    db.add(UserDB(id=1, email="test@example.com"))
+    books = [CookbookDB(name=name, owner_id=1) for name in cookbooks]
+    db.add_all(books)
+    db.commit()
+    return books
+
+
+def import_recipe(db, title, cookbooks, **fields):
+    # Wie POST /api/import
+    recipe = RecipeDB(title=title, original_url=f"https://example.com/{title}", owner_id=1, **fields)
+    recipe.cookbooks = cookbooks
+    db.add(recipe)
+    record_recipe_change(db, 1, None, recipe_facts(recipe))
+    for cb in recipe.cookbooks:
+        record_cookbook_membership(db, 1, cb.id, +1)
+    db.commit()
+    return recipe
+
+
+def delete_recipe(db, recipe):
+    # Wie DELETE /api/recipes/{id}
+    before = recipe_facts(recipe)
+    cookbook_ids = [cb.id for cb in recipe.cookbooks]
+    db.delete(recipe)
+    record_recipe_change(db, 1, before, None)
+    for cb_id in cookbook_ids:
+        record_cookbook_membership(db, 1, cb_id, -1)
+    db.commit()
+
+
+def assert_matches_rebuild(db):
+    incremental = copy.deepcopy(stats_response(db.query(UserStatsDB).filter(UserStatsDB.user_id == 1).one()))
+    rebuilt = stats_response(rebuild_stats(db, 1))
+    db.rollback()
+    assert incremental == rebuilt
+    return incremental
+
+
+def cookbook_counts(response):
+    return {cb["name"]: cb["count"] for cb in response["cookbooks"]}
+
+
+def test_first_import_into_cookbook_counts_membership_once(db):
+    pasta, quick = setup_user(db)
+
+    import_recipe(db, "carbonara", [pasta, quick], rating=4, total_time=25)
+
+    response = assert_matches_rebuild(db)
+    assert cookbook_counts(response) == {"Pasta": 1, "Schnell": 1}
+    assert response["recipe_count"] == 1
+
+
+def test_first_delete_from_cookbook_counts_membership_once(db):
+    pasta, quick = setup_user(db)
+    keep = RecipeDB(title="arrabbiata", owner_id=1, cookbooks=[pasta])
+    drop = RecipeDB(title="carbonara", owner_id=1, cookbooks=[pasta, quick])
+    db.add_all([keep, drop])
+    db.commit()  # ohne user_stats-Zeile, wie vor der Migration importiert
+
+    delete_recipe(db, drop)
+
+    response = assert_matches_rebuild(db)
+    assert cookbook_counts(response) == {"Pasta": 1, "Schnell": 0}
+
+
+def test_incremental_updates_match_rebuild(db):
+    pasta, quick = setup_user(db)
+    rebuild_stats(db, 1)
+    db.commit()
+
+    first = import_recipe(db, "carbonara", [pasta], rating=5, total_time=20)
+    import_recipe(db, "lasagne", [pasta, quick], rating=3, total_time=90)
+    import_recipe(db, "salat", [], total_time=10)
+    assert_matches_rebuild(db)
+
+    for _ in range(2):
+        # Wie POST /api/recipes/{id}/mark-cooked
+        before = recipe_facts(first)
+        first.cook_count += 1
+        record_recipe_change(db, 1, before, recipe_facts(first))
+        db.commit()
+    assert assert_matches_rebuild(db)["most_cooked"] == [{"id": first.id, "title": "carbonara", "cook_count": 2}]
+
+    delete_recipe(db, first)
+    response = assert_matches_rebuild(db)
+    assert cookbook_counts(response) == {"Pasta": 1, "Schnell": 1}
+    assert response["recipe_count"] == 2
+
+
+def test_rebuild_marker_is_cleared_on_commit(db):
+    pasta, _ = setup_user(db)
+
+    import_recipe(db, "carbonara", [pasta])
+    import_recipe(db, "lasagne", [pasta])  # neue Transaktion: wieder inkrementell
+
+    response = assert_matches_rebuild(db)
+    assert cookbook_counts(response)["Pasta"] == 2
+    assert "user_stats_rebuilt" not in db.info
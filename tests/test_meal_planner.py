@@ -0,0 +1,93 @@
+import datetime
+
+import pytest
+from pydantic import ValidationError
+
+from api.db_models import CookbookDB, MealPlanRequest, RecipeDB, UserDB
+from api.meal_planner import index_ingredients, load_library, plan_meals
+
+NOW = datetime.datetime(2026, 10, 19, 12, 0)
+
+
+def add_recipe(db, title, ingredients, owner_id=1, **fields):
+    recipe = RecipeDB(title=title, ingredients_str="|".join(ingredients), owner_id=owner_id, **fields)
+    index_ingredients(recipe)
+    db.add(recipe)
+    return recipe
+
+
+@pytest.fixture
+def library(db):
+    db.add_all([UserDB(id=1, email="a@example.com"), UserDB(id=2, email="b@example.com")])
+    pasta = CookbookDB(name="Pasta", owner_id=1)
+    db.add(pasta)
+    recipes = {
+        "carbonara": add_recipe(db, "Carbonara", ["200 g Spaghetti", "Guanciale", "2 Eier"],
+                                rating=5, total_time=25, cookbooks=[pasta]),
+        "lasagne": add_recipe(db, "Lasagne", ["Lasagneplatten", "500 g Hackfleisch", "Tomaten"],
+                              rating=4, total_time=90, cookbooks=[pasta],
+                              last_cooked=NOW - datetime.timedelta(days=3)),
+        "salat": add_recipe(db, "Salat", ["Gurke", "Tomaten"], rating=3, total_time=10,
+                            last_cooked=NOW - datetime.timedelta(weeks=5)),
+        "eintopf": add_recipe(db, "Eintopf", ["Linsen", "Karotten"], rating=2, total_time=None),
+    }
+    add_recipe(db, "Fremdes Rezept", ["Salz"], owner_id=2, rating=5, total_time=5)
+    db.commit()
+    return pasta, recipes
+
+
+def titles(library):
+    return sorted(library.titles)
+
+
+def test_only_own_recipes(db, library):
+    assert titles(load_library(db, 1)) == ["Carbonara", "Eintopf", "Lasagne", "Salat"]
+
+
+def test_cookbook_filter(db, library):
+    pasta, _ = library
+    assert titles(load_library(db, 1, cookbook_ids=[pasta.id])) == ["Carbonara", "Lasagne"]
+
+
+def test_max_time_excludes_longer_and_unknown_times(db, library):
+    assert titles(load_library(db, 1, max_time_per_day=30)) == ["Carbonara", "Salat"]
+
+
+def test_no_repeat_weeks_cutoff(db, library):
+    # Lasagne vor 3 Tagen gekocht, Salat vor 5 Wochen
+    assert titles(load_library(db, 1, no_repeat_weeks=1, now=NOW)) == ["Carbonara", "Eintopf", "Salat"]
+    assert titles(load_library(db, 1, no_repeat_weeks=6, now=NOW)) == ["Carbonara", "Eintopf"]
+
+
+def test_more_days_than_recipes(db, library):
+    plan = plan_meals(load_library(db, 1, max_time_per_day=30), days=7)
+
+    assert [r["title"] for r in plan["recipes"]] == ["Carbonara", "Salat"]
+    assert plan["shopping_list"] == ["eier", "guanciale", "gurke", "spaghetti", "tomaten"]
+
+
+def test_empty_library(db):
+    assert plan_meals(load_library(db, 1), days=7) == {"recipes": [], "shopping_list": [], "shared_ingredients": 0}
+
+
+def test_overlap_weight_changes_the_pick(db):
+    db.add(UserDB(id=1, email="a@example.com"))
+    add_recipe(db, "Tomatensuppe", ["Tomaten", "Zwiebel", "Basilikum"], rating=5)
+    add_recipe(db, "Linsencurry", ["Linsen", "Kokosmilch", "Curry"], rating=4)
+    add_recipe(db, "Tomatensalat", ["Tomaten", "Zwiebel", "Basilikum"], rating=3)
+    db.commit()
+    library = load_library(db, 1)
+
+    by_rating = plan_meals(library, days=2, overlap_weight=0)
+    by_overlap = plan_meals(library, days=2, overlap_weight=1)
+
+    assert [r["title"] for r in by_rating["recipes"]] == ["Tomatensuppe", "Linsencurry"]
+    assert [r["title"] for r in by_overlap["recipes"]] == ["Tomatensuppe", "Tomatensalat"]
+    assert by_overlap["shared_ingredients"] == 3
+    assert len(by_overlap["shopping_list"]) < len(by_rating["shopping_list"])
+
+
+@pytest.mark.parametrize("days", [0, 29])
+def test_days_is_bounded(days):
+    with pytest.raises(ValidationError):
+        MealPlanRequest(days=days)
@@ -0,0 +1,136 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from api import rate_limit
+from api.rate_limit import InMemoryBackend, RateLimiter, SingleFlight, SQLBackend, canonical_url
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_bucket_denies_when_drained_and_refills(clock):
+    limiter = RateLimiter(InMemoryBackend(), "test", per_minute=60, capacity=2)   # 1 Token/s
+
+    assert limiter.hit("a") == 0
+    assert limiter.hit("a") == 0
+    assert limiter.hit("a") == pytest.approx(1.0)
+    assert limiter.hit("b") == 0          # andere Keys sind unabhängig
+
+    clock[0] += 0.5
+    assert limiter.hit("a") == pytest.approx(0.5)
+    clock[0] += 0.5
+    assert limiter.hit("a") == 0
+    assert limiter.hit("a") == pytest.approx(1.0)
+
+
+def test_pruning_drops_only_full_buckets(clock):
+    backend = InMemoryBackend()
+    fast = RateLimiter(backend, "fast", per_minute=60, capacity=5)    # nach 5 s wieder voll
+    slow = RateLimiter(backend, "slow", per_minute=1, capacity=5)     # nach 5 min wieder voll
+    for _ in range(5):
+        fast.hit("a")
+        slow.hit("a")
+
+    clock[0] += backend.PRUNE_INTERVAL
+    fast.hit("b")
+
+    assert set(backend._buckets) == {"slow:a", "fast:b"}
+    assert slow.hit("a") == 0             # 1 Token in 60 s nachgefüllt
+    assert slow.hit("a") > 0
+
+
+def test_sql_backend_does_not_fail_open_on_conflicts():
+    class ConflictingSession:
+        def query(self, *args):
+            return SimpleNamespace(filter=lambda *a: SimpleNamespace(with_for_update=lambda: SimpleNamespace(first=lambda: None)))
+
+        def add(self, obj):
+            pass
+
+        def commit(self):
+            raise IntegrityError("INSERT", {}, Exception("duplicate key"))
+
+        def rollback(self):
+            pass
+
+        def close(self):
+            pass
+
+    backend = SQLBackend.__new__(SQLBackend)
+    backend.Session = ConflictingSession
+
+    assert backend.take("k", rate=0.5, capacity=1) == pytest.approx(2.0)
+
+
+def test_sql_backend_limits(db):
+    backend = SQLBackend(db.get_bind())
+    limiter = RateLimiter(backend, "test", per_minute=60, capacity=1)
+
+    assert limiter.hit(1) == 0
+    assert limiter.hit(1) > 0
+
+
+def run_concurrently(flight, fn, callers=5):
+    results = [None] * callers
+
+    def call(i):
+        try:
+            results[i] = flight.do("key", fn)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def test_single_flight_runs_once_and_shares_the_result():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)   # alle anderen Aufrufer kommen an, während der erste läuft
+        return {"title": "Carbonara"}
+
+    results = run_concurrently(flight, fetch)
+
+    assert len(calls) == 1
+    assert all(result == {"title": "Carbonara"} for result in results)
+    assert flight._calls == {}
+
+
+def test_single_flight_shares_the_exception():
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        raise ValueError("No recipe found")
+
+    results = run_concurrently(flight, fetch)
+
+    assert len(calls) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+    # Nach dem Fehler startet der nächste Aufruf einen neuen Abruf
+    assert flight.do("key", lambda: "ok") == "ok"
+
+
+def test_canonical_url():
+    assert canonical_url(
+        " HTTPS://WWW.Chefkoch.de/rezepte/123/carbonara.html/?utm_source=x&b=2&fbclid=abc&a=1#kommentare"
+    ) == "https://www.chefkoch.de/rezepte/123/carbonara.html?a=1&b=2"
+    assert canonical_url("https://example.com") == "https://example.com/"
+    assert canonical_url("https://example.com/r?ref=home") == "https://example.com/r"
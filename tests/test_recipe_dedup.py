@@ -0,0 +1,57 @@
+import time
+
+from api import recipe_dedup
+from api.db_models import RecipeDB, UserDB
+from api.recipe_dedup import find_duplicate_clusters, find_similar, index_recipe, recipe_signature
+
+CARBONARA = "200 g Spaghetti|100 g Guanciale|2 Eier|50 g Pecorino|Pfeffer|Salz"
+
+
+def add_recipe(db, title, ingredients_str):
+    recipe = RecipeDB(title=title, ingredients_str=ingredients_str, owner_id=1)
+    index_recipe(recipe)
+    db.add(recipe)
+    return recipe
+
+
+def test_near_duplicates_are_clustered(db):
+    db.add(UserDB(id=1, email="test@example.com"))
+    a = add_recipe(db, "Spaghetti Carbonara", CARBONARA)
+    b = add_recipe(db, "Spaghetti Carbonara original", CARBONARA)
+    add_recipe(db, "Linsensuppe", "Linsen|Karotten|Sellerie|Brühe")
+    db.commit()
+
+    assert find_duplicate_clusters(db, 1) == [[{"id": a.id, "title": a.title}, {"id": b.id, "title": b.title}]]
+    assert [m["id"] for m in find_similar(db, 1, recipe_signature(a.title, a.ingredients_str), exclude_id=a.id)] == [b.id]
+
+
+def test_recipes_without_tokens_are_not_duplicates(db):
+    db.add(UserDB(id=1, email="test@example.com"))
+    for title in ("Ei", "Ob", "XY"):
+        recipe = add_recipe(db, title, None)
+        assert recipe.minhash_signature is None
+        assert recipe.lsh_buckets == []
+    db.commit()
+
+    assert recipe_signature("Ei", "") is None
+    assert find_duplicate_clusters(db, 1) == []
+
+
+def test_large_cluster_is_linear_in_bucket_size(db, monkeypatch):
+    size = 500
+    db.add(UserDB(id=1, email="test@example.com"))
+    for i in range(size):
+        add_recipe(db, f"Spaghetti Carbonara {'x' * (i % 3 + 3)}", CARBONARA)
+    db.commit()
+
+    start = time.perf_counter()
+    clusters = find_duplicate_clusters(db, 1)
+    elapsed = time.perf_counter() - start
+    assert len(clusters) == 1 and len(clusters[0]) == size
+    assert elapsed < 2.0
+
+    # Schlechtester Fall: nichts wird vereinigt. Paarweise wären es BANDS * size² / 2 Vergleiche
+    calls = []
+    monkeypatch.setattr(recipe_dedup, "similarity", lambda a, b: calls.append(1) or 0.0)
+    assert find_duplicate_clusters(db, 1) == []
+    assert len(calls) <= recipe_dedup.BANDS * size
@@ -0,0 +1,154 @@
+import datetime
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from api.db_models import RecipeDB, UserDB, UserStatsDB
+from api.library_stats import rebuild_stats, stats_response
+from api.recipe_refresher import RecipeRefresher
+
+
+ROBOTS = "User-agent: *\nDisallow: /private/\n"
+ETAG = '"v2"'
+
+
+def recipe_page(title, ingredients):
+    data = {"@context": "https://schema.org", "@type": "Recipe", "name": title, "recipeIngredient": ingredients}
+    return f'<html><script type="application/ld+json">{json.dumps(data)}</script></html>'.encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        StubHandler.requests.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/robots.txt":
+            self._send(200, ROBOTS.encode())
+        elif self.path == "/changed":
+            self._send(200, recipe_page("Neuer Titel", ["200 g Spaghetti", "Salz"]), {"ETag": ETAG})
+        elif self.path == "/unchanged":
+            if self.headers.get("If-None-Match") == ETAG:
+                self._send(304, b"")
+            else:
+                self._send(200, recipe_page("Gleich", ["Salz"]), {"ETag": ETAG})
+        else:
+            self._send(404, b"")
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    StubHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def add_recipe(db, url, title, **fields):
+    recipe = RecipeDB(title=title, original_url=url, ingredients_str="Salz", owner_id=1, **fields)
+    db.add(recipe)
+    return recipe
+
+
+def test_refresh_against_stub_server(db, stub_server):
+    db.add(UserDB(id=1, email="test@example.com"))
+    changed = add_recipe(db, stub_server + "/changed", "Alter Titel")
+    unchanged = add_recipe(db, stub_server + "/unchanged", "Gleich", etag=ETAG)
+    blocked = add_recipe(db, stub_server + "/private/1", "Privat")
+    db.commit()
+
+    stats = RecipeRefresher(host_delay=0, time_budget=10, timeout=2).run(db)
+
+    assert stats == {"checked": 3, "updated": 1, "not_modified": 1, "blocked": 1, "error": 0, "skipped": 0}
+    assert changed.title == "Neuer Titel"
+    assert changed.ingredients_str == "200 g Spaghetti|Salz"
+    assert changed.ingredient_keys == "spaghetti|salz"
+    assert changed.etag == ETAG
+    assert unchanged.title == "Gleich"
+    assert blocked.title == "Privat"
+    assert all(r.last_fetched is not None for r in (changed, unchanged, blocked))
+
+    paths = [path for path, _ in StubHandler.requests]
+    assert paths.count("/robots.txt") == 1
+    assert "/private/1" not in paths
+    assert ("/unchanged", ETAG) in StubHandler.requests
+
+
+def test_image_removed_at_the_source_is_cleared(db, stub_server):
+    db.add(UserDB(id=1, email="test@example.com"))
+    recipe = add_recipe(db, stub_server + "/changed", "Neuer Titel", image_url="https://img.example.com/weg.jpg")
+    recipe.ingredients_str = "200 g Spaghetti|Salz"
+    db.commit()
+
+    stats = RecipeRefresher(host_delay=0, time_budget=10, timeout=2).run(db)
+
+    # Wie beim Import: ohne Bild in der Quelle der Platzhalter statt des toten Links
+    assert stats["updated"] == 1
+    assert recipe.image_url == "https://via.placeholder.com/600x400"
+    assert recipe.ingredients_str == "200 g Spaghetti|Salz"
+
+
+def test_apply_changes_clears_empty_image_but_keeps_other_fields():
+    recipe = RecipeDB(title="Alt", image_url="https://img.example.com/weg.jpg", ingredients_str="Salz", total_time=20)
+
+    assert RecipeRefresher.apply_changes(recipe, {"title": "Alt", "image_url": "", "ingredients_str": ""})
+
+    assert recipe.image_url is None
+    assert recipe.ingredients_str == "Salz"
+    assert recipe.total_time == 20
+    assert not RecipeRefresher.apply_changes(recipe, {"title": "Alt", "image_url": None})
+
+
+def test_recently_fetched_recipes_are_not_refreshed(db, stub_server):
+    db.add(UserDB(id=1, email="test@example.com"))
+    add_recipe(db, stub_server + "/changed", "Alter Titel", last_fetched=datetime.datetime.utcnow())
+    db.commit()
+
+    stats = RecipeRefresher(host_delay=0, time_budget=10, timeout=2).run(db)
+
+    assert stats["checked"] == 0
+    assert StubHandler.requests == []
+
+
+def test_requests_that_could_outlast_the_budget_are_not_started(db, stub_server):
+    db.add(UserDB(id=1, email="test@example.com"))
+    recipe = add_recipe(db, stub_server + "/changed", "Alter Titel")
+    db.commit()
+
+    stats = RecipeRefresher(host_delay=0, time_budget=1, timeout=2).run(db)
+
+    assert stats["skipped"] == 1
+    assert recipe.last_fetched is None
+    assert StubHandler.requests == []
+
+
+def test_refresh_updates_library_stats(db, stub_server):
+    db.add(UserDB(id=1, email="test@example.com"))
+    add_recipe(db, stub_server + "/changed", "Alter Titel", cook_count=2)
+    db.commit()
+    rebuild_stats(db, 1)
+    db.commit()
+
+    RecipeRefresher(host_delay=0, time_budget=10, timeout=2).run(db)
+
+    stats = db.query(UserStatsDB).filter(UserStatsDB.user_id == 1).one()
+    assert stats.top_cooked[0]["title"] == "Neuer Titel"
+    incremental = stats_response(stats)
+    assert incremental == stats_response(rebuild_stats(db, 1))